@@ -24,6 +24,21 @@ from .models import ChainOfCustodyEvent, EvidenceDocument
 
 logger = logging.getLogger(__name__)
 
+# Rows per multi-row INSERT when bulk indexing into PostgreSQL
+BULK_PAGE_SIZE = 500
+
+
+def fetch_dicts(cursor) -> List[Dict]:
+    """
+    Fetch all rows from a plain cursor as dicts keyed by column name.
+    
+    Column names are read from cursor.description once per query, and each
+    row becomes one plain dict (a RealDictCursor row copied with dict() made
+    two).
+    """
+    columns = [column.name for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
 
 class LocalFilesystemObjectStore(ObjectStore):
     def __init__(self, config: StorageTargetConfig) -> None:
@@ -634,6 +649,9 @@ class PostgresMetadataStore(MetadataStore):
         2. Inserts/updates documents
         3. Inserts attachments
         4. Records chain of custody events
+        
+        Each step is one multi-row statement per BULK_PAGE_SIZE rows for the
+        whole batch, not a round-trip per document.
         """
         if not documents:
             return
@@ -642,18 +660,17 @@ class PostgresMetadataStore(MetadataStore):
             cursor = conn.cursor()
             
             try:
-                for doc in documents:
-                    # 1. Insert/get custodian
-                    custodian_id = self._upsert_custodian(cursor, doc)
-                    
-                    # 2. Insert/update document
-                    doc_id = self._upsert_document(cursor, doc, custodian_id)
-                    
-                    # 3. Insert attachments
-                    self._insert_attachments(cursor, doc, doc_id)
-                    
-                    # 4. Record chain of custody events
-                    self._insert_custody_events(cursor, doc, doc_id)
+                # 1. Insert/get custodians
+                custodian_ids = self._upsert_custodians(cursor, documents)
+                
+                # 2. Insert/update documents
+                doc_ids = self._upsert_documents(cursor, documents, custodian_ids)
+                
+                # 3. Insert attachments
+                self._insert_attachments(cursor, documents, doc_ids)
+                
+                # 4. Record chain of custody events
+                self._insert_custody_events(cursor, documents, doc_ids)
                 
                 conn.commit()
                 logger.info("Successfully indexed %d documents in PostgreSQL", len(documents))
@@ -665,30 +682,42 @@ class PostgresMetadataStore(MetadataStore):
             finally:
                 cursor.close()
     
-    def _upsert_custodian(self, cursor, document: EvidenceDocument) -> int:
-        """Insert or update custodian and return their ID."""
-        cursor.execute(
+    def _upsert_custodians(self, cursor, documents: List[EvidenceDocument]) -> Dict[str, int]:
+        """Insert or update the batch's custodians and return their IDs by identifier."""
+        # ON CONFLICT can't touch a row twice in one statement, so each custodian
+        # appears once (the last document's details win, as with per-row upserts)
+        custodians = {doc.custodian.identifier: doc.custodian for doc in documents}
+        
+        rows = psycopg2.extras.execute_values(
+            cursor,
             """
             INSERT INTO custodians (identifier, display_name, email)
-            VALUES (%s, %s, %s)
+            VALUES %s
             ON CONFLICT (identifier) 
             DO UPDATE SET
                 display_name = EXCLUDED.display_name,
                 email = EXCLUDED.email,
                 updated_at = CURRENT_TIMESTAMP
-            RETURNING id
+            RETURNING identifier, id
             """,
-            (
-                document.custodian.identifier,
-                document.custodian.display_name,
-                document.custodian.email,
-            ),
+            [
+                (custodian.identifier, custodian.display_name, custodian.email)
+                for custodian in custodians.values()
+            ],
+            page_size=BULK_PAGE_SIZE,
+            fetch=True,
         )
-        return cursor.fetchone()[0]
+        return dict(rows)
     
-    def _upsert_document(self, cursor, document: EvidenceDocument, custodian_id: int) -> int:
-        """Insert or update document and return its ID."""
-        cursor.execute(
+    def _upsert_documents(
+        self, cursor, documents: List[EvidenceDocument], custodian_ids: Dict[str, int]
+    ) -> Dict[str, int]:
+        """Insert or update the batch's documents and return their IDs by document_id."""
+        # One row per document_id; the last occurrence wins, as with per-row upserts
+        unique_documents = {doc.document_id: doc for doc in documents}
+        
+        rows = psycopg2.extras.execute_values(
+            cursor,
             """
             INSERT INTO documents (
                 document_id,
@@ -700,7 +729,7 @@ class PostgresMetadataStore(MetadataStore):
                 collected_at,
                 metadata_json
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            VALUES %s
             ON CONFLICT (document_id)
             DO UPDATE SET
                 source = EXCLUDED.source,
@@ -711,28 +740,41 @@ class PostgresMetadataStore(MetadataStore):
                 collected_at = EXCLUDED.collected_at,
                 metadata_json = EXCLUDED.metadata_json,
                 indexed_at = CURRENT_TIMESTAMP
-            RETURNING id
+            RETURNING document_id, id
             """,
-            (
-                document.document_id,
-                document.source,
-                custodian_id,
-                document.subject,
-                document.body_text,
-                document.raw_path,
-                document.collected_at,
-                json.dumps(document.metadata),
-            ),
+            [
+                (
+                    doc.document_id,
+                    doc.source,
+                    custodian_ids[doc.custodian.identifier],
+                    doc.subject,
+                    doc.body_text,
+                    doc.raw_path,
+                    doc.collected_at,
+                    json.dumps(doc.metadata),
+                )
+                for doc in unique_documents.values()
+            ],
+            page_size=BULK_PAGE_SIZE,
+            fetch=True,
         )
-        return cursor.fetchone()[0]
+        return dict(rows)
     
-    def _insert_attachments(self, cursor, document: EvidenceDocument, doc_id: int) -> None:
-        """Insert attachments for a document."""
-        if not document.attachments:
+    def _insert_attachments(
+        self, cursor, documents: List[EvidenceDocument], doc_ids: Dict[str, int]
+    ) -> None:
+        """Replace the attachments of every document in the batch that has any."""
+        # The last occurrence of a document with attachments wins
+        attachments = {
+            doc_ids[doc.document_id]: doc.attachments
+            for doc in documents
+            if doc.attachments
+        }
+        if not attachments:
             return
         
-        # Delete existing attachments for this document
-        cursor.execute("DELETE FROM attachments WHERE document_id = %s", (doc_id,))
+        # Delete existing attachments for these documents
+        cursor.execute("DELETE FROM attachments WHERE document_id = ANY(%s)", (list(attachments),))
         
         # Insert new attachments
         attachment_data = [
@@ -743,42 +785,47 @@ class PostgresMetadataStore(MetadataStore):
                 att.size_bytes,
                 att.checksum_sha256,
             )
-            for att in document.attachments
+            for doc_id, doc_attachments in attachments.items()
+            for att in doc_attachments
         ]
         
-        psycopg2.extras.execute_batch(
+        psycopg2.extras.execute_values(
             cursor,
             """
             INSERT INTO attachments (document_id, filename, content_type, size_bytes, checksum_sha256)
-            VALUES (%s, %s, %s, %s, %s)
+            VALUES %s
             """,
             attachment_data,
+            page_size=BULK_PAGE_SIZE,
         )
     
-    def _insert_custody_events(self, cursor, document: EvidenceDocument, doc_id: int) -> None:
-        """Record chain of custody events for a document."""
-        if not document.chain_of_custody:
-            return
-        
+    def _insert_custody_events(
+        self, cursor, documents: List[EvidenceDocument], doc_ids: Dict[str, int]
+    ) -> None:
+        """Record chain of custody events for every document in the batch."""
         custody_data = [
             (
-                doc_id,
+                doc_ids[doc.document_id],
                 event.timestamp,
                 event.actor,
                 event.action,
                 json.dumps(event.metadata),
             )
-            for event in document.chain_of_custody
+            for doc in documents
+            for event in doc.chain_of_custody
         ]
+        if not custody_data:
+            return
         
-        psycopg2.extras.execute_batch(
+        psycopg2.extras.execute_values(
             cursor,
             """
             INSERT INTO custody_events (document_id, event_timestamp, actor, action, metadata_json)
-            VALUES (%s, %s, %s, %s, %s)
+            VALUES %s
             ON CONFLICT DO NOTHING
             """,
             custody_data,
+            page_size=BULK_PAGE_SIZE,
         )
     
     def search(self, query: str, limit: int = 100) -> List[Dict]:
@@ -793,7 +840,7 @@ class PostgresMetadataStore(MetadataStore):
             List of document dictionaries with relevance scores
         """
         with self._get_connection() as conn:
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor = conn.cursor()
             
             cursor.execute(
                 """
@@ -814,14 +861,14 @@ class PostgresMetadataStore(MetadataStore):
                 (query, query, limit),
             )
             
-            results = cursor.fetchall()
+            results = fetch_dicts(cursor)
             cursor.close()
-            return [dict(row) for row in results]
+            return results
     
     def get_documents_by_custodian(self, custodian_email: str, limit: int = 100) -> List[Dict]:
         """Get all documents from a specific custodian."""
         with self._get_connection() as conn:
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor = conn.cursor()
             
             cursor.execute(
                 """
@@ -841,9 +888,43 @@ class PostgresMetadataStore(MetadataStore):
                 (custodian_email, limit),
             )
             
-            results = cursor.fetchall()
+            results = fetch_dicts(cursor)
+            cursor.close()
+            return results
+    
+    def count_documents_by_custodian(self, source: Optional[str] = None) -> List[Dict]:
+        """
+        Count documents per custodian, aggregated in the database.
+        
+        Args:
+            source: Only count documents from this source (e.g. a connector name)
+        
+        Returns:
+            List of {custodian_name, custodian_email, document_count}, largest first
+        """
+        where = "WHERE d.source = %s" if source is not None else ""
+        
+        with self._get_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(
+                f"""
+                SELECT 
+                    c.display_name as custodian_name,
+                    c.email as custodian_email,
+                    COUNT(*) as document_count
+                FROM documents d
+                LEFT JOIN custodians c ON d.custodian_id = c.id
+                {where}
+                GROUP BY c.display_name, c.email
+                ORDER BY document_count DESC
+                """,
+                (source,) if source is not None else None,
+            )
+            
+            results = fetch_dicts(cursor)
             cursor.close()
-            return [dict(row) for row in results]
+            return results
     
     def get_document_count(self) -> int:
         """Get total number of indexed documents."""
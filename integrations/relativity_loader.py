@@ -16,13 +16,19 @@ Standard Relativity format:
 from __future__ import annotations
 
 import csv
+import io
 import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, List, Optional
 
 logger = logging.getLogger(__name__)
 
+# Characters that force csv.writer to quote a field (default excel dialect)
+_CSV_NEEDS_QUOTING = re.compile(r'["\r\n]')
+
 
 @dataclass
 class RelativityDocument:
@@ -71,6 +77,7 @@ class RelativityLoadFileParser:
         self.encoding = encoding
         self.documents: List[RelativityDocument] = []
         self.field_names: List[str] = []
+        self._lower_field_names: List[str] = []
     
     def parse(self) -> List[RelativityDocument]:
         """
@@ -87,6 +94,7 @@ class RelativityLoadFileParser:
             
             # First row is field names
             self.field_names = next(reader)
+            self._lower_field_names = [name.lower() for name in self.field_names]
             logger.info(f"Found {len(self.field_names)} fields: {self.field_names}")
             
             # Parse documents
@@ -106,8 +114,8 @@ class RelativityLoadFileParser:
         # Create field mapping
         field_map = dict(zip(self.field_names, row))
         
-        # Map to standard fields (case-insensitive)
-        field_map_lower = {k.lower(): v for k, v in field_map.items()}
+        # Map to standard fields (case-insensitive, names folded once in parse())
+        field_map_lower = dict(zip(self._lower_field_names, row))
         
         return RelativityDocument(
             doc_id=field_map_lower.get('docid') or field_map_lower.get('document_id', ''),
@@ -130,6 +138,23 @@ class RelativityLoadFileParser:
 class RelativityEnrichmentExporter:
     """Export AI enrichment results in Relativity-compatible format."""
     
+    # Header row of the enrichment CSV, pre-encoded (csv.writer uses \r\n)
+    ENRICHMENT_HEADER = b','.join([
+        b'DocID',
+        b'AI_Responsive',
+        b'AI_Responsive_Confidence',
+        b'AI_Privileged',
+        b'AI_Privilege_Confidence',
+        b'AI_Privilege_Type',
+        b'AI_Classification',
+        b'AI_Topics',
+        b'Hot_Score',
+        b'AI_Sentiment',
+        b'AI_Entities',
+        b'Redaction_Suggestions',
+        b'Similar_Document_IDs',
+    ]) + b'\r\n'
+    
     def __init__(self, output_path: Path):
         """
         Initialize exporter.
@@ -150,32 +175,16 @@ class RelativityEnrichmentExporter:
         """
         logger.info(f"Exporting {len(documents)} enriched documents to {self.output_path}")
         
-        with open(self.output_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            
+        with open(self.output_path, 'wb', buffering=1 << 20) as f:
             # Header row
-            writer.writerow([
-                'DocID',
-                'AI_Responsive',
-                'AI_Responsive_Confidence',
-                'AI_Privileged',
-                'AI_Privilege_Confidence',
-                'AI_Privilege_Type',
-                'AI_Classification',
-                'AI_Topics',
-                'Hot_Score',
-                'AI_Sentiment',
-                'AI_Entities',
-                'Redaction_Suggestions',
-                'Similar_Document_IDs',
-            ])
+            f.write(self.ENRICHMENT_HEADER)
             
             # Data rows
             for doc in documents:
                 topics_str = ';'.join(doc.ai_topics) if doc.ai_topics else ''
                 
-                writer.writerow([
-                    doc.doc_id,
+                row = [
+                    doc.doc_id or '',
                     doc.ai_responsive or '',
                     f"{doc.ai_responsive_confidence:.2f}" if doc.ai_responsive_confidence else '',
                     doc.ai_privileged or '',
@@ -188,7 +197,16 @@ class RelativityEnrichmentExporter:
                     '',  # AI_Entities (comma-separated)
                     '',  # Redaction_Suggestions (JSON or coordinates)
                     '',  # Similar_Document_IDs (semicolon-separated)
-                ])
+                ]
+                
+                line = ','.join(row)
+                if line.count(',') != len(row) - 1 or _CSV_NEEDS_QUOTING.search(line):
+                    # Rare: a field needs quoting, let the csv module escape it
+                    buf = io.StringIO()
+                    csv.writer(buf).writerow(row)
+                    f.write(buf.getvalue().encode('utf-8'))
+                else:
+                    f.write(line.encode('utf-8') + b'\r\n')
         
         logger.info(f"Successfully exported enrichment file to {self.output_path}")
     
@@ -221,6 +239,17 @@ class RelativityEnrichmentExporter:
                 ])
 
 
+def _read_extracted_text(text_dir: Path, doc: RelativityDocument) -> Optional[str]:
+    """Read a document's extracted text from text_dir, or None if it has none."""
+    if not doc.extracted_text_path:
+        return None
+    text_path = text_dir / Path(doc.extracted_text_path).name
+    try:
+        return text_path.read_bytes().decode('utf-8', 'ignore')
+    except FileNotFoundError:
+        return None
+
+
 # Example usage
 def example_workflow():
     """Example of complete import → analyze → export workflow."""
@@ -233,13 +262,13 @@ def example_workflow():
     print(f"Fields: {parser.get_field_names()}")
     
     # 2. Run your AI analysis on each document
-    for doc in documents:
-        # Read the extracted text
-        if doc.extracted_text_path:
-            text_path = Path('/path/to/TEXT') / Path(doc.extracted_text_path).name
-            if text_path.exists():
-                text_content = text_path.read_text()
-                
+    # Extracted text is read on a thread pool so disk reads overlap with analysis
+    text_dir = Path('/path/to/TEXT')
+    with ThreadPoolExecutor(max_workers=32) as pool:
+        texts = pool.map(lambda d: _read_extracted_text(text_dir, d), documents)
+        
+        for doc, text_content in zip(documents, texts):
+            if text_content is not None:
                 # YOUR AI ANALYSIS HERE
                 # doc.ai_responsive = analyze_responsiveness(text_content)
                 # doc.ai_responsive_confidence = 0.95
@@ -0,0 +1,20 @@
+-- Notify AI workers when new documents arrive
+-- Run this file: psql -h <host> -U <user> -d <database> -f scripts/add_ai_queue_notify.sql
+--
+-- scripts/ai_worker.py LISTENs on the ai_documents_pending channel and wakes up
+-- as soon as documents are inserted instead of waiting out its sleep interval.
+
+CREATE OR REPLACE FUNCTION notify_ai_documents_pending() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('ai_documents_pending', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- One notification per INSERT statement, so bulk loads don't flood the channel
+DROP TRIGGER IF EXISTS documents_notify_ai_pending ON documents;
+CREATE TRIGGER documents_notify_ai_pending
+    AFTER INSERT
+    ON documents
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION notify_ai_documents_pending();
@@ -0,0 +1,40 @@
+-- Track AI analysis state on documents so workers can claim work atomically
+-- Run this file: psql -h <host> -U <user> -d <database> -f scripts/add_ai_status_queue.sql
+--
+-- Workers claim pending documents with UPDATE ... FOR UPDATE SKIP LOCKED, so two
+-- workers never analyze the same document, and the pending scan is an index seek
+-- instead of documents LEFT JOIN ai_analysis.
+--
+-- States: pending -> processing -> done
+--         processing -> pending (failed, retried) or failed (out of retries)
+
+ALTER TABLE documents
+ADD COLUMN IF NOT EXISTS ai_status TEXT NOT NULL DEFAULT 'pending',
+ADD COLUMN IF NOT EXISTS ai_retry_count INTEGER NOT NULL DEFAULT 0;
+
+-- Documents analyzed before this migration are already done
+DO $$
+BEGIN
+    IF to_regclass('ai_analysis') IS NOT NULL THEN
+        UPDATE documents d
+        SET ai_status = 'done'
+        FROM ai_analysis a
+        WHERE a.document_id = d.document_id
+          AND d.ai_status <> 'done';
+    END IF;
+END;
+$$;
+
+-- Only pending rows are indexed, so the index stays small as the corpus is analyzed.
+-- The claim's "WHERE ai_status = 'pending' ORDER BY collected_at DESC LIMIT n" reads
+-- the first n entries of this index; no anti-join against ai_analysis and no sort.
+CREATE INDEX IF NOT EXISTS documents_ai_status_idx
+ON documents(ai_status, collected_at DESC)
+WHERE ai_status = 'pending';
+
+-- The backfill above rewrote most rows; refresh planner statistics so the partial
+-- index is chosen immediately rather than after the next autovacuum analyze
+ANALYZE documents;
+
+-- If a worker is killed mid-batch its documents stay 'processing'. Requeue them with:
+--   UPDATE documents SET ai_status = 'pending' WHERE ai_status = 'processing';
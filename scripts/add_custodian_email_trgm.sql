@@ -0,0 +1,17 @@
+-- Trigram index for the substring custodian filter in scripts/search.py
+-- Run this file: psql -h <host> -U <user> -d <database> -f scripts/add_custodian_email_trgm.sql
+--
+-- search.py --custodian filters with c.email ILIKE '%<text>%'. A leading wildcard
+-- can't use a btree, so without this every search reads all of custodians.
+-- A pg_trgm GIN index answers ILIKE '%...%' (and LIKE/~*) directly for patterns
+-- of three or more characters; shorter ones fall back to a scan as before.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Built CONCURRENTLY so ingestion can keep upserting custodians meanwhile
+-- (run outside a transaction; psql -f does)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS custodians_email_trgm_idx
+ON custodians USING gin (email gin_trgm_ops);
+
+-- Refresh statistics so the planner's ILIKE estimates account for the new index
+ANALYZE custodians;
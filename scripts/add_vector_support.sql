@@ -1,24 +1,30 @@
 -- Add pgvector extension and embedding column for semantic search
 -- Run this file: psql -h <host> -U <user> -d <database> -f scripts/add_vector_support.sql
+--
+-- Every statement is idempotent, and the index statements use CONCURRENTLY, so
+-- run them outside a transaction (psql -f does; scripts/apply_vector_migration.py
+-- executes them one at a time and skips the file entirely once it's applied).
 
 -- Enable the pgvector extension
 CREATE EXTENSION IF NOT EXISTS vector;
 
 -- Add embedding column to documents table (1536 dimensions for OpenAI text-embedding-3-small)
-ALTER TABLE documents 
-ADD COLUMN IF NOT EXISTS embedding vector(1536);
-
--- Create index for fast vector similarity search
-CREATE INDEX IF NOT EXISTS documents_embedding_idx 
-ON documents USING ivfflat (embedding vector_cosine_ops)
-WITH (lists = 100);
-
--- Add metadata columns for embedding tracking
+-- plus metadata columns for embedding tracking
 ALTER TABLE documents
+ADD COLUMN IF NOT EXISTS embedding vector(1536),
 ADD COLUMN IF NOT EXISTS embedding_model VARCHAR(100),
 ADD COLUMN IF NOT EXISTS embedding_generated_at TIMESTAMP;
 
+-- Create index for fast vector similarity search
+-- HNSW (pgvector >= 0.5.0) answers queries faster and with better recall than ivfflat,
+-- and unlike ivfflat doesn't need its lists retuned as the corpus grows.
+-- Built CONCURRENTLY so ingestion and embedding writes aren't blocked meanwhile.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS documents_embedding_hnsw_idx
+ON documents USING hnsw (embedding vector_cosine_ops);
+
+-- Drop the ivfflat index created by earlier versions of this migration
+DROP INDEX CONCURRENTLY IF EXISTS documents_embedding_idx;
+
 COMMENT ON COLUMN documents.embedding IS 'Vector embedding for semantic search (1536-dim from OpenAI text-embedding-3-small)';
 COMMENT ON COLUMN documents.embedding_model IS 'Model used to generate embedding';
 COMMENT ON COLUMN documents.embedding_generated_at IS 'Timestamp when embedding was generated';
-
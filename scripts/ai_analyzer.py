@@ -16,31 +16,86 @@ Usage:
 """
 
 import argparse
-import json
+import csv
+import io
 import os
+import re
 import sys
+import weakref
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, List, Optional
 
+import orjson
 import psycopg2
 import psycopg2.extras
 import requests
+from requests.adapters import HTTPAdapter
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+from urllib3.util.retry import Retry
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from scripts.env_file import read_env_file
+
+# JSON object inside a ```json (or bare ```) fenced block in the model response
+_JSON_BLOCK = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+
+OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+# Only this much of a document's body goes into the analysis prompt
+PROMPT_BODY_CHARS = 2000
+
+# Buffered analyses are flushed to the database with COPY every this many documents
+COPY_BATCH_SIZE = 100
+
+_AI_ANALYSIS_COLUMNS = (
+    "document_id, summary, entities, relevance_score, "
+    "classification, privilege_risk, topics, action_items, review_notes"
+)
+
+# Failed documents go back to the queue until they have failed this many times
+MAX_AI_RETRIES = 3
+
+# Attempts per document when OpenRouter answers 429 Too Many Requests
+RATE_LIMIT_ATTEMPTS = 3
+
+# One keep-alive session for every OpenRouter call, so TLS is negotiated once per
+# connection instead of once per document. Transient 5xx answers are retried
+# here; 429s are retried (with jitter) by analyze_document_with_ai.
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=32,
+    max_retries=Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[500, 502, 503, 504],
+        allowed_methods=["POST"],
+        raise_on_status=False,
+    ),
+))
+
+# custodians.id -> email, filled lazily by _custodian_emails
+_CUSTODIAN_EMAILS: Dict[int, str] = {}
+
+# Connections that already have the ai_analysis schema ensured and ai_upsert prepared
+_PREPARED_CONNECTIONS = weakref.WeakSet()
+
+
+class RateLimitError(Exception):
+    """OpenRouter rejected a request with 429 Too Many Requests."""
+
 
 def load_env():
     """Load environment variables from .env file."""
-    env_file = Path(__file__).parent.parent / ".env"
-    if env_file.exists():
-        with open(env_file) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#") and "=" in line:
-                    key, value = line.split("=", 1)
-                    os.environ[key.strip()] = value.strip()
+    os.environ.update(read_env_file(Path(__file__).parent.parent / ".env") or {})
 
 
 def get_db_connection():
@@ -60,21 +115,13 @@ def get_db_connection():
     )
 
 
-def analyze_document_with_ai(subject: str, body: str, custodian: str) -> Dict:
-    """Analyze a document using AI (OpenRouter API)."""
-    
-    api_key = os.environ.get("OPENROUTER_API_KEY")
-    model = os.environ.get("OPENROUTER_MODEL", "anthropic/claude-3.5-sonnet")
-    
-    if not api_key:
-        raise ValueError("OPENROUTER_API_KEY not found in environment")
-    
-    # Prepare the prompt
-    prompt = f"""Analyze this email for e-discovery purposes. Provide a structured analysis.
+def build_analysis_prompt(subject: str, body: str, custodian: str) -> str:
+    """Build the e-discovery analysis prompt for one document."""
+    return f"""Analyze this email for e-discovery purposes. Provide a structured analysis.
 
 Subject: {subject}
 From: {custodian}
-Body: {body[:2000]}  # First 2000 chars
+Body: {body[:PROMPT_BODY_CHARS]}  # First 2000 chars
 
 Please provide:
 1. **Summary** (2-3 sentences)
@@ -102,15 +149,57 @@ Format your response as JSON with these exact keys:
   "action_items": ["item1"],
   "review_notes": "Focus on..."
 }}"""
+
+
+def parse_analysis_response(ai_response: str) -> Dict:
+    """Parse the model's reply into an analysis dict (with a fallback on bad JSON)."""
+    try:
+        # Try to extract JSON from markdown code blocks
+        match = _JSON_BLOCK.search(ai_response)
+        json_str = match.group(1) if match else ai_response.strip()
+        
+        analysis = orjson.loads(json_str)
+        return analysis
+    except orjson.JSONDecodeError as e:
+        print(f"Warning: Could not parse AI response as JSON: {e}")
+        print(f"Response: {ai_response[:500]}")
+        # Return a basic analysis
+        return {
+            "summary": ai_response[:200],
+            "entities": {"people": [], "companies": [], "dates": [], "amounts": []},
+            "relevance_score": 50,
+            "classification": "Needs Review",
+            "privilege_risk": 0,
+            "topics": [],
+            "action_items": [],
+            "review_notes": "AI analysis failed - manual review required"
+        }
+
+
+def openrouter_request(subject: str, body: str, custodian: str) -> Dict:
+    """Build the OpenRouter chat completion request for a document.
     
-    # Call OpenRouter API
-    response = requests.post(
-        url="https://openrouter.ai/api/v1/chat/completions",
-        headers={
+    Returns ``url``/``headers``/``json`` keyword arguments, accepted as-is by
+    both requests.post and httpx's client.post.
+    """
+    api_key = os.environ.get("OPENROUTER_API_KEY")
+    model = os.environ.get("OPENROUTER_MODEL", "anthropic/claude-3.5-sonnet")
+    
+    if not api_key:
+        raise ValueError("OPENROUTER_API_KEY not found in environment")
+    
+    # Prepare the prompt
+    prompt = build_analysis_prompt(subject, body, custodian)
+    
+    return {
+        "url": OPENROUTER_URL,
+        "headers": {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
+            # Accept-Encoding is left to each client: requests and httpx can
+            # decode different codecs, so each advertises its own default
         },
-        json={
+        "json": {
             "model": model,
             "messages": [
                 {
@@ -121,47 +210,74 @@ Format your response as JSON with these exact keys:
             "temperature": 0.3,  # Lower temperature for more consistent output
             "max_tokens": 1000
         }
-    )
-    
+    }
+
+
+def parse_openrouter_response(response) -> Dict:
+    """Turn an OpenRouter HTTP response (requests or httpx) into an analysis dict."""
+    if response.status_code == 429:
+        raise RateLimitError(f"OpenRouter rate limit: {response.text}")
     if response.status_code != 200:
         raise Exception(f"OpenRouter API error: {response.status_code} - {response.text}")
     
     result = response.json()
     ai_response = result["choices"][0]["message"]["content"]
     
-    # Parse JSON from response
+    return parse_analysis_response(ai_response)
+
+
+@retry(
+    retry=retry_if_exception_type(RateLimitError),
+    stop=stop_after_attempt(RATE_LIMIT_ATTEMPTS),
+    wait=wait_random_exponential(multiplier=1, max=30),
+    reraise=True,
+)
+def analyze_document_with_ai(subject: str, body: str, custodian: str) -> Dict:
+    """Analyze a document using AI (OpenRouter API)."""
+    
+    # Call OpenRouter API
+    response = _SESSION.post(**openrouter_request(subject, body, custodian))
+    
+    return parse_openrouter_response(response)
+
+
+def _score(value) -> Optional[int]:
+    """Coerce a model-reported 0-100 score to an int, or None if it isn't a number."""
     try:
-        # Try to extract JSON from markdown code blocks
-        if "```json" in ai_response:
-            json_str = ai_response.split("```json")[1].split("```")[0].strip()
-        elif "```" in ai_response:
-            json_str = ai_response.split("```")[1].split("```")[0].strip()
-        else:
-            json_str = ai_response.strip()
-        
-        analysis = json.loads(json_str)
-        return analysis
-    except json.JSONDecodeError as e:
-        print(f"Warning: Could not parse AI response as JSON: {e}")
-        print(f"Response: {ai_response[:500]}")
-        # Return a basic analysis
-        return {
-            "summary": ai_response[:200],
-            "entities": {"people": [], "companies": [], "dates": [], "amounts": []},
-            "relevance_score": 50,
-            "classification": "Needs Review",
-            "privilege_risk": 0,
-            "topics": [],
-            "action_items": [],
-            "review_notes": "AI analysis failed - manual review required"
-        }
+        return max(0, min(100, round(float(value))))
+    except (TypeError, ValueError, OverflowError):
+        return None
 
 
-def store_ai_analysis(document_id: str, analysis: Dict):
-    """Store AI analysis results in PostgreSQL."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def analysis_row(document_id: str, analysis: Dict) -> tuple:
+    """Flatten an analysis dict into ai_analysis column order.
+    
+    Scores and classification are coerced to what the columns accept, so one
+    odd model answer (e.g. "relevance_score": "high") can't fail a bulk COPY.
+    """
+    return (
+        document_id,
+        analysis.get("summary"),
+        orjson.dumps(analysis.get("entities", {})).decode(),
+        _score(analysis.get("relevance_score", 0)),
+        str(analysis.get("classification", "Unknown"))[:50],
+        _score(analysis.get("privilege_risk", 0)),
+        orjson.dumps(analysis.get("topics", [])).decode(),
+        orjson.dumps(analysis.get("action_items", [])).decode(),
+        analysis.get("review_notes")
+    )
+
+
+def prepare_ai_analysis(conn):
+    """Ensure the ai_analysis table exists and prepare the upsert on this connection.
     
+    Prepared statements live as long as the server session, so this only does
+    work the first time it sees a given connection.
+    """
+    if conn in _PREPARED_CONNECTIONS:
+        return
+    
+    cursor = conn.cursor()
     try:
         # First, check if ai_analysis table exists, if not create it
         cursor.execute("""
@@ -195,13 +311,124 @@ def store_ai_analysis(document_id: str, analysis: Dict):
             ON ai_analysis(classification)
         """)
         
-        # Insert or update analysis
+        # Parse and plan the upsert once per session
         cursor.execute("""
-            INSERT INTO ai_analysis (
-                document_id, summary, entities, relevance_score,
-                classification, privilege_risk, topics, action_items, review_notes
+            PREPARE ai_upsert (text, text, jsonb, int, varchar, int, jsonb, jsonb, text) AS
+            WITH stored AS (
+                INSERT INTO ai_analysis (
+                    document_id, summary, entities, relevance_score,
+                    classification, privilege_risk, topics, action_items, review_notes
+                )
+                VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+                ON CONFLICT (document_id)
+                DO UPDATE SET
+                    summary = EXCLUDED.summary,
+                    entities = EXCLUDED.entities,
+                    relevance_score = EXCLUDED.relevance_score,
+                    classification = EXCLUDED.classification,
+                    privilege_risk = EXCLUDED.privilege_risk,
+                    topics = EXCLUDED.topics,
+                    action_items = EXCLUDED.action_items,
+                    review_notes = EXCLUDED.review_notes,
+                    analyzed_at = CURRENT_TIMESTAMP
+                RETURNING document_id
             )
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            UPDATE documents SET ai_status = 'done'
+            WHERE document_id IN (SELECT document_id FROM stored)
+        """)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+    
+    _PREPARED_CONNECTIONS.add(conn)
+
+
+def store_ai_analysis(document_id: str, analysis: Dict, conn=None):
+    """Store AI analysis results in PostgreSQL.
+    
+    Pass ``conn`` to reuse one connection (and its prepared upsert) across
+    many documents; otherwise a short-lived connection is opened.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = get_db_connection()
+    
+    try:
+        store_ai_analysis_row(analysis_row(document_id, analysis), conn)
+    finally:
+        if own_conn:
+            conn.close()
+
+
+def store_ai_analysis_row(row: tuple, conn):
+    """Upsert one pre-flattened analysis_row in its own transaction."""
+    prepare_ai_analysis(conn)
+    cursor = conn.cursor()
+    
+    try:
+        # Insert or update analysis
+        cursor.execute("EXECUTE ai_upsert (%s, %s, %s, %s, %s, %s, %s, %s, %s)", row)
+        
+        conn.commit()
+        print(f"✅ Stored AI analysis for {row[0]}")
+        
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Error storing analysis: {e}")
+        raise
+    finally:
+        cursor.close()
+
+
+def store_ai_analyses(rows: List[tuple], conn) -> List[str]:
+    """Bulk-store many analyses in one transaction.
+    
+    ``rows`` are pre-flattened with analysis_row (JSON already serialized),
+    so this only has to format them for COPY. Rows are streamed into a temp table with COPY and merged into
+    ai_analysis with a single INSERT ... ON CONFLICT, which is much cheaper
+    than one upsert round-trip per document.
+    
+    If the bulk load fails, the rows are retried one at a time, so a single
+    bad row doesn't throw away the rest. Returns the document IDs that could
+    not be stored.
+    """
+    if not rows:
+        return []
+    
+    prepare_ai_analysis(conn)
+    
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    buf.seek(0)
+    
+    cursor = conn.cursor()
+    try:
+        # Scores are staged as numeric so a fractional model answer doesn't fail the COPY
+        cursor.execute("""
+            CREATE TEMP TABLE _ai_stage (
+                document_id TEXT,
+                summary TEXT,
+                entities JSONB,
+                relevance_score NUMERIC,
+                classification VARCHAR(50),
+                privilege_risk NUMERIC,
+                topics JSONB,
+                action_items JSONB,
+                review_notes TEXT
+            ) ON COMMIT DROP
+        """)
+        cursor.copy_expert(f"COPY _ai_stage ({_AI_ANALYSIS_COLUMNS}) FROM STDIN WITH (FORMAT csv)", buf)
+        
+        cursor.execute(f"""
+            INSERT INTO ai_analysis ({_AI_ANALYSIS_COLUMNS})
+            SELECT DISTINCT ON (document_id)
+                document_id, summary, entities, relevance_score::int,
+                classification, privilege_risk::int, topics, action_items, review_notes
+            FROM _ai_stage
+            ORDER BY document_id
             ON CONFLICT (document_id)
             DO UPDATE SET
                 summary = EXCLUDED.summary,
@@ -213,90 +440,226 @@ def store_ai_analysis(document_id: str, analysis: Dict):
                 action_items = EXCLUDED.action_items,
                 review_notes = EXCLUDED.review_notes,
                 analyzed_at = CURRENT_TIMESTAMP
-        """, (
-            document_id,
-            analysis.get("summary"),
-            json.dumps(analysis.get("entities", {})),
-            analysis.get("relevance_score", 0),
-            analysis.get("classification", "Unknown"),
-            analysis.get("privilege_risk", 0),
-            json.dumps(analysis.get("topics", [])),
-            json.dumps(analysis.get("action_items", [])),
-            analysis.get("review_notes")
-        ))
+        """)
+        
+        cursor.execute("""
+            UPDATE documents d SET ai_status = 'done'
+            FROM _ai_stage s
+            WHERE d.document_id = s.document_id
+        """)
         
         conn.commit()
-        print(f"✅ Stored AI analysis for {document_id}")
+        print(f"✅ Stored AI analysis for {len(rows)} document(s)")
+        return []
         
     except Exception as e:
         conn.rollback()
-        print(f"❌ Error storing analysis: {e}")
+        print(f"❌ Error storing batch of {len(rows)}: {e} - storing one at a time")
+    finally:
+        cursor.close()
+    
+    failed = []
+    for row in rows:
+        try:
+            store_ai_analysis_row(row, conn)
+        except Exception:
+            failed.append(row[0])
+    return failed
+
+
+def _custodian_emails(cursor, custodian_ids) -> Dict:
+    """Return the cached custodian id -> email map.
+    
+    Custodians are few and rarely change, so the table is loaded once per
+    process and reloaded only when a document references an unknown id.
+    """
+    if any(cid is not None and cid not in _CUSTODIAN_EMAILS for cid in custodian_ids):
+        cursor.execute("SELECT id, email FROM custodians")
+        _CUSTODIAN_EMAILS.clear()
+        _CUSTODIAN_EMAILS.update((row['id'], row['email']) for row in cursor.fetchall())
+    return _CUSTODIAN_EMAILS
+
+
+def claim_pending_documents(conn, limit: Optional[int] = None,
+                            body_chars: Optional[int] = PROMPT_BODY_CHARS) -> List[Dict]:
+    """Atomically claim up to ``limit`` pending documents for analysis.
+    
+    Claimed rows are marked 'processing' and committed, and rows locked by
+    another worker's claim are skipped, so concurrent workers never pick up
+    the same document. Requires scripts/add_ai_status_queue.sql.
+    
+    Only the first ``body_chars`` characters of body_text are fetched, since
+    that is all the prompt uses; pass None for the full body.
+    """
+    body = "body_text" if body_chars is None else "left(body_text, %(body_chars)s) AS body_text"
+    
+    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    try:
+        cursor.execute(f"""
+            WITH claimed AS (
+                UPDATE documents
+                SET ai_status = 'processing'
+                WHERE document_id IN (
+                    SELECT document_id
+                    FROM documents
+                    WHERE ai_status = 'pending'
+                    ORDER BY collected_at DESC
+                    LIMIT %(limit)s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING document_id, subject, {body}, custodian_id, collected_at
+            )
+            SELECT document_id, subject, body_text, custodian_id
+            FROM claimed
+            ORDER BY collected_at DESC
+        """, {"limit": limit, "body_chars": body_chars})
+        documents = cursor.fetchall()
+        
+        # Custodian emails come from the in-process cache rather than a JOIN per claim
+        emails = _custodian_emails(cursor, {doc['custodian_id'] for doc in documents})
+        for doc in documents:
+            doc['custodian_email'] = emails.get(doc['custodian_id'])
+        
+        conn.commit()
+    except Exception:
+        conn.rollback()
         raise
     finally:
         cursor.close()
-        conn.close()
+    
+    return documents
+
+
+def release_documents(conn, document_ids: Iterable[str]):
+    """Return claimed documents whose analysis failed to the queue.
+    
+    Each release counts as a retry; after MAX_AI_RETRIES the document is
+    marked 'failed' instead of 'pending'.
+    """
+    if not document_ids:
+        return
+    
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            UPDATE documents
+            SET ai_retry_count = ai_retry_count + 1,
+                ai_status = CASE WHEN ai_retry_count + 1 >= %s THEN 'failed' ELSE 'pending' END
+            WHERE document_id = ANY(%s) AND ai_status = 'processing'
+        """, (MAX_AI_RETRIES, list(document_ids)))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def _flush_rows(rows: List[tuple], conn):
+    """Bulk-store and clear buffered analysis rows, requeueing any that failed."""
+    try:
+        failed = store_ai_analyses(rows, conn)
+    except Exception as e:
+        print(f"  ❌ Error storing batch of {len(rows)}: {e}\n")
+        failed = [row[0] for row in rows]
+    release_documents(conn, failed)
+    rows.clear()
+
+
+def _analyze_document(doc: Dict) -> Dict:
+    """Run one document through the LLM and print the result."""
+    print(f"  Subject: {(doc['subject'] or '')[:60]}...")
+    
+    analysis = analyze_document_with_ai(
+        subject=doc['subject'] or "",
+        body=doc['body_text'] or "",
+        custodian=doc['custodian_email'] or "Unknown"
+    )
+    
+    # Print summary
+    print(f"  Classification: {analysis.get('classification')}")
+    print(f"  Relevance: {analysis.get('relevance_score')}/100")
+    print(f"  Summary: {analysis.get('summary', '')[:80]}...")
+    print()
+    return analysis
 
 
 def analyze_documents(limit: Optional[int] = None, document_id: Optional[str] = None):
-    """Analyze documents with AI."""
+    """Analyze documents with AI.
+    
+    Pending documents are claimed COPY_BATCH_SIZE at a time, and each chunk's
+    analyses are COPY'd before the next claim. Whatever happens (an error,
+    Ctrl-C), buffered analyses are stored and unprocessed claims released.
+    """
     
     conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
     
-    # Get documents to analyze
+    # A single document is upserted directly
     if document_id:
-        cursor.execute("""
-            SELECT d.document_id, d.subject, d.body_text, c.email as custodian_email
-            FROM documents d
-            LEFT JOIN custodians c ON d.custodian_id = c.id
-            WHERE d.document_id = %s
-        """, (document_id,))
-    else:
-        # Get documents that haven't been analyzed yet
-        cursor.execute("""
-            SELECT d.document_id, d.subject, d.body_text, c.email as custodian_email
-            FROM documents d
-            LEFT JOIN custodians c ON d.custodian_id = c.id
-            LEFT JOIN ai_analysis a ON d.document_id = a.document_id
-            WHERE a.id IS NULL
-            ORDER BY d.collected_at DESC
-            {}
-        """.format(f"LIMIT {limit}" if limit else ""))
-    
-    documents = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    
-    if not documents:
-        print("ℹ️  No documents to analyze")
+        try:
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cursor.execute("""
+                SELECT d.document_id, d.subject, d.body_text, c.email as custodian_email
+                FROM documents d
+                LEFT JOIN custodians c ON d.custodian_id = c.id
+                WHERE d.document_id = %s
+            """, (document_id,))
+            doc = cursor.fetchone()
+            cursor.close()
+            
+            if not doc:
+                print("ℹ️  No documents to analyze")
+                return
+            
+            print("\n🤖 Analyzing 1 document(s) with AI...\n")
+            print(f"[1/1] Analyzing: {doc['document_id']}")
+            try:
+                store_ai_analysis(doc['document_id'], _analyze_document(doc), conn=conn)
+            except Exception as e:
+                print(f"  ❌ Error: {e}\n")
+        finally:
+            conn.close()
         return
     
-    print(f"\n🤖 Analyzing {len(documents)} document(s) with AI...\n")
+    rows = []
+    unprocessed = set()   # claimed, but neither buffered in rows nor released yet
+    analyzed = 0
     
-    for i, doc in enumerate(documents, 1):
-        print(f"[{i}/{len(documents)}] Analyzing: {doc['document_id']}")
-        print(f"  Subject: {doc['subject'][:60]}...")
-        
-        try:
-            # Analyze with AI
-            analysis = analyze_document_with_ai(
-                subject=doc['subject'] or "",
-                body=doc['body_text'] or "",
-                custodian=doc['custodian_email'] or "Unknown"
-            )
+    try:
+        while limit is None or analyzed < limit:
+            chunk = COPY_BATCH_SIZE if limit is None else min(COPY_BATCH_SIZE, limit - analyzed)
+            documents = claim_pending_documents(conn, chunk)
+            if not documents:
+                break
+            unprocessed.update(doc['document_id'] for doc in documents)
             
-            # Store results
-            store_ai_analysis(doc['document_id'], analysis)
+            if analyzed == 0:
+                print("\n🤖 Analyzing documents with AI...\n")
             
-            # Print summary
-            print(f"  Classification: {analysis.get('classification')}")
-            print(f"  Relevance: {analysis.get('relevance_score')}/100")
-            print(f"  Summary: {analysis.get('summary', '')[:80]}...")
-            print()
+            for doc in documents:
+                analyzed += 1
+                print(f"[{analyzed}{'' if limit is None else f'/{limit}'}] Analyzing: {doc['document_id']}")
+                
+                try:
+                    analysis = _analyze_document(doc)
+                except Exception as e:
+                    print(f"  ❌ Error: {e}\n")
+                    release_documents(conn, [doc['document_id']])
+                else:
+                    # Serialize now, while the parsed response is still hot
+                    rows.append(analysis_row(doc['document_id'], analysis))
+                unprocessed.discard(doc['document_id'])
             
-        except Exception as e:
-            print(f"  ❌ Error: {e}\n")
-            continue
+            _flush_rows(rows, conn)
+        
+        if analyzed == 0:
+            print("ℹ️  No documents to analyze")
+    finally:
+        try:
+            _flush_rows(rows, conn)
+            release_documents(conn, unprocessed)
+        finally:
+            conn.close()
 
 
 def show_analysis_report():
@@ -5,6 +5,10 @@ AI Worker - Continuous Document Analysis
 This worker runs continuously and processes pending documents in batches.
 It monitors the database for new documents and automatically analyzes them with AI.
 
+Between batches the worker LISTENs on the ai_documents_pending channel, so new
+documents are picked up immediately once scripts/add_ai_queue_notify.sql has been
+applied. The sleep interval remains as a polling fallback.
+
 Usage:
     python3 scripts/ai_worker.py                    # Run forever
     python3 scripts/ai_worker.py --once             # Process one batch and exit
@@ -13,6 +17,7 @@ Usage:
 
 import argparse
 import os
+import select
 import sys
 import time
 from datetime import datetime
@@ -26,32 +31,25 @@ from ai_analyzer import (
     load_env,
     get_db_connection,
     analyze_document_with_ai,
-    store_ai_analysis
+    store_ai_analysis,
+    claim_pending_documents,
+    release_documents
 )
 import psycopg2
+import psycopg2.extensions
 import psycopg2.extras
 
+# Channel notified by the documents INSERT trigger (scripts/add_ai_queue_notify.sql)
+PENDING_CHANNEL = "ai_documents_pending"
+
 
 def get_pending_documents(batch_size=10):
-    """Get documents that haven't been analyzed yet."""
+    """Claim documents that haven't been analyzed yet (marked 'processing')."""
     conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    
-    cursor.execute("""
-        SELECT d.document_id, d.subject, d.body_text, c.email as custodian_email
-        FROM documents d
-        LEFT JOIN custodians c ON d.custodian_id = c.id
-        LEFT JOIN ai_analysis a ON d.document_id = a.document_id
-        WHERE a.id IS NULL
-        ORDER BY d.collected_at DESC
-        LIMIT %s
-    """, (batch_size,))
-    
-    documents = cursor.fetchall()
-    cursor.close()
-    conn.close()
-    
-    return documents
+    try:
+        return claim_pending_documents(conn, batch_size)
+    finally:
+        conn.close()
 
 
 def process_batch(batch_size=10):
@@ -64,31 +62,59 @@ def process_batch(batch_size=10):
     print(f"\n[{datetime.now().strftime('%H:%M:%S')}] Processing {len(documents)} pending documents...")
     
     success_count = 0
-    for i, doc in enumerate(documents, 1):
-        try:
-            print(f"  [{i}/{len(documents)}] Analyzing: {doc['document_id']}")
-            
-            # Analyze with AI
-            analysis = analyze_document_with_ai(
-                subject=doc['subject'] or "",
-                body=doc['body_text'] or "",
-                custodian=doc['custodian_email'] or "Unknown"
-            )
-            
-            # Store results
-            store_ai_analysis(doc['document_id'], analysis)
-            
-            success_count += 1
-            print(f"      ✓ {analysis.get('classification')} | Relevance: {analysis.get('relevance_score')}/100")
-            
-        except Exception as e:
-            print(f"      ✗ Error: {str(e)[:100]}")
-            continue
+    conn = get_db_connection()
+    try:
+        for i, doc in enumerate(documents, 1):
+            try:
+                print(f"  [{i}/{len(documents)}] Analyzing: {doc['document_id']}")
+                
+                # Analyze with AI
+                analysis = analyze_document_with_ai(
+                    subject=doc['subject'] or "",
+                    body=doc['body_text'] or "",
+                    custodian=doc['custodian_email'] or "Unknown"
+                )
+                
+                # Store results (one connection per batch keeps the upsert prepared)
+                store_ai_analysis(doc['document_id'], analysis, conn=conn)
+                
+                success_count += 1
+                print(f"      ✓ {analysis.get('classification')} | Relevance: {analysis.get('relevance_score')}/100")
+                
+            except Exception as e:
+                print(f"      ✗ Error: {str(e)[:100]}")
+                release_documents(conn, [doc['document_id']])
+                continue
+    finally:
+        conn.close()
     
     print(f"[{datetime.now().strftime('%H:%M:%S')}] Batch complete: {success_count}/{len(documents)} successful\n")
     return success_count
 
 
+def open_listen_connection():
+    """Open an autocommit connection subscribed to new-document notifications."""
+    conn = get_db_connection()
+    conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+    cursor = conn.cursor()
+    cursor.execute(f"LISTEN {PENDING_CHANNEL}")
+    cursor.close()
+    return conn
+
+
+def wait_for_documents(conn, timeout):
+    """Block until documents are inserted or timeout seconds pass.
+    
+    Returns True if woken by a notification, False on timeout.
+    """
+    if select.select([conn], [], [], timeout) == ([], [], []):
+        return False
+    
+    conn.poll()
+    conn.notifies.clear()
+    return True
+
+
 def run_worker(batch_size=10, sleep_interval=30, run_once=False):
     """Run the worker continuously."""
     
@@ -108,15 +134,17 @@ def run_worker(batch_size=10, sleep_interval=30, run_once=False):
         return
     
     # Run continuously
+    listen_conn = open_listen_connection()
     try:
         while True:
             try:
                 processed = process_batch(batch_size)
                 
                 if processed == 0:
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] No pending documents. Waiting {sleep_interval}s...")
+                    print(f"[{datetime.now().strftime('%H:%M:%S')}] No pending documents. Waiting up to {sleep_interval}s for new ones...")
                 
-                time.sleep(sleep_interval)
+                # Wakes early on INSERT notifications; polls again on timeout
+                wait_for_documents(listen_conn, sleep_interval)
                 
             except KeyboardInterrupt:
                 raise
@@ -124,11 +152,15 @@ def run_worker(batch_size=10, sleep_interval=30, run_once=False):
                 print(f"[{datetime.now().strftime('%H:%M:%S')}] Worker error: {e}")
                 print(f"Retrying in {sleep_interval}s...")
                 time.sleep(sleep_interval)
+                if listen_conn.closed:
+                    listen_conn = open_listen_connection()
     
     except KeyboardInterrupt:
         print("\n\n" + "=" * 70)
         print("🛑 AI WORKER STOPPED")
         print("=" * 70)
+    finally:
+        listen_conn.close()
 
 
 def get_worker_status():
@@ -139,9 +171,8 @@ def get_worker_status():
     # Get pending count
     cursor.execute("""
         SELECT COUNT(*) as count
-        FROM documents d
-        LEFT JOIN ai_analysis a ON d.document_id = a.document_id
-        WHERE a.id IS NULL
+        FROM documents
+        WHERE ai_status = 'pending'
     """)
     pending = cursor.fetchone()['count']
     
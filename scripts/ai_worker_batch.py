@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+AI Batch Worker - Asynchronous Document Analysis via the OpenAI Batch API
+
+Instead of one HTTPS request per document, pending documents are written to a
+single JSONL file, uploaded once, and processed by the provider as a batch
+(roughly half the per-token cost, completed within 24h). Results are bulk-stored
+in ai_analysis when the batch finishes.
+
+Documents are claimed (marked 'processing') when the batch is submitted, so a
+concurrent worker won't pick them up; any without a stored result go back to
+the queue when the run ends, however it ends. Submitted batch IDs are appended
+to ai_batches.log, so results of an interrupted run can still be collected
+with --resume.
+
+Usage:
+    python3 scripts/ai_worker_batch.py                     # Submit and wait for one batch
+    python3 scripts/ai_worker_batch.py --batch-size 5000   # Larger batch
+    python3 scripts/ai_worker_batch.py --resume batch_abc  # Collect an earlier batch's results
+    python3 scripts/ai_worker_batch.py --realtime          # Use the synchronous worker instead
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import orjson
+from openai import OpenAI
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Import the analyzer and worker functions
+from ai_analyzer import (
+    load_env,
+    get_db_connection,
+    build_analysis_prompt,
+    parse_analysis_response,
+    store_ai_analyses,
+    release_documents,
+    analysis_row
+)
+from ai_worker import get_pending_documents, process_batch
+
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+
+# Terminal batch states (see https://platform.openai.com/docs/api-reference/batch)
+FINISHED_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# Every submitted batch is recorded here so its results can be collected with --resume
+BATCH_LOG = Path(__file__).parent.parent / "ai_batches.log"
+
+
+def build_batch_file(documents, model):
+    """Build the batch input JSONL, one chat completion request per document."""
+    lines = []
+    for doc in documents:
+        prompt = build_analysis_prompt(
+            subject=doc['subject'] or "",
+            body=doc['body_text'] or "",
+            custodian=doc['custodian_email'] or "Unknown"
+        )
+        lines.append(orjson.dumps({
+            "custom_id": doc['document_id'],
+            "method": "POST",
+            "url": CHAT_COMPLETIONS_URL,
+            "body": {
+                "model": model,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": 0.3,
+                "max_tokens": 1000
+            }
+        }))
+    return b"\n".join(lines) + b"\n"
+
+
+def submit_batch(client, jsonl):
+    """Upload the JSONL and start a batch. Returns the batch object."""
+    input_file = client.files.create(
+        file=("ai_analysis_batch.jsonl", io.BytesIO(jsonl)),
+        purpose="batch"
+    )
+    return client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=CHAT_COMPLETIONS_URL,
+        completion_window="24h"
+    )
+
+
+def record_batch(batch_id, document_count):
+    """Append a submitted batch to BATCH_LOG."""
+    with open(BATCH_LOG, "a") as f:
+        f.write(f"{datetime.now().isoformat(timespec='seconds')}\t{batch_id}\t{document_count}\n")
+
+
+def wait_for_batch(client, batch_id, poll_interval=60):
+    """Poll until the batch reaches a terminal state and return it."""
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] Batch {batch.status}: "
+              f"{counts.completed}/{counts.total} completed, {counts.failed} failed")
+
+        if batch.status in FINISHED_STATUSES:
+            return batch
+
+        time.sleep(poll_interval)
+
+
+def collect_results(client, batch):
+    """Download batch output and turn each successful line into an ai_analysis row."""
+    rows = []
+    failed = 0
+
+    if not batch.output_file_id:
+        return rows, failed
+
+    output = client.files.content(batch.output_file_id).content
+    for line in output.splitlines():
+        if not line:
+            continue
+
+        try:
+            item = orjson.loads(line)
+            response = item.get("response") or {}
+            if item.get("error") or response.get("status_code") != 200:
+                failed += 1
+                print(f"  ✗ {item['custom_id']}: {item.get('error') or response.get('status_code')}")
+                continue
+
+            ai_response = response["body"]["choices"][0]["message"]["content"]
+            rows.append(analysis_row(item["custom_id"], parse_analysis_response(ai_response)))
+        except (orjson.JSONDecodeError, KeyError, IndexError, TypeError) as e:
+            # One malformed line must not cost the rest of the (already paid for) output
+            failed += 1
+            print(f"  ✗ Malformed batch output line: {e!r}")
+
+    return rows, failed
+
+
+def finish_batch(client, batch_id, poll_interval=60):
+    """Wait for a submitted batch and store its results. Returns (stored, failed)."""
+    batch = wait_for_batch(client, batch_id, poll_interval)
+    if batch.status != "completed":
+        print(f"❌ Batch ended with status: {batch.status}")
+
+    rows, failed = collect_results(client, batch)
+
+    conn = get_db_connection()
+    try:
+        unstored = store_ai_analyses(rows, conn)
+    finally:
+        conn.close()
+
+    return len(rows) - len(unstored), failed + len(unstored)
+
+
+def run_batch(batch_size=1000, model="gpt-4o-mini", poll_interval=60):
+    """Submit one batch of pending documents, wait for it, and store the results."""
+    documents = get_pending_documents(batch_size)
+
+    if not documents:
+        print("ℹ️  No pending documents")
+        return 0
+
+    try:
+        client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] Submitting {len(documents)} documents as a batch ({model})...")
+        batch = submit_batch(client, build_batch_file(documents, model))
+        record_batch(batch.id, len(documents))
+        print(f"  Batch ID: {batch.id} (if interrupted, collect it with --resume {batch.id})")
+
+        stored, failed = finish_batch(client, batch.id, poll_interval)
+    finally:
+        # Stored documents are already 'done'; everything else (failed or expired
+        # requests, or any error or Ctrl-C before storing) goes back to the queue
+        conn = get_db_connection()
+        try:
+            release_documents(conn, [doc['document_id'] for doc in documents])
+        finally:
+            conn.close()
+
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Batch complete: {stored}/{len(documents)} successful, {failed} failed\n")
+    return stored
+
+
+def resume_batch(batch_id, poll_interval=60):
+    """Collect and store the results of a batch submitted by an earlier run."""
+    client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Resuming batch {batch_id}...")
+    stored, failed = finish_batch(client, batch_id, poll_interval)
+
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Batch complete: {stored} stored, {failed} failed\n")
+    return stored
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="AI Batch Worker using the OpenAI Batch API",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument("--batch-size", type=int, default=1000, help="Documents per batch (default: 1000)")
+    parser.add_argument("--model", default=os.environ.get("OPENAI_BATCH_MODEL", "gpt-4o-mini"),
+                        help="Model for batch requests (default: $OPENAI_BATCH_MODEL or gpt-4o-mini)")
+    parser.add_argument("--poll", type=int, default=60, help="Batch status poll interval in seconds (default: 60)")
+    parser.add_argument("--resume", metavar="BATCH_ID",
+                        help="Wait for and store the results of an already submitted batch (see ai_batches.log)")
+    parser.add_argument("--realtime", action="store_true",
+                        help="Analyze synchronously through OpenRouter instead of the Batch API")
+
+    args = parser.parse_args()
+
+    load_env()
+
+    try:
+        if args.realtime:
+            processed = process_batch(args.batch_size)
+            print(f"✅ Processed {processed} documents.")
+            return
+
+        if not os.environ.get("OPENAI_API_KEY"):
+            print("\n❌ Error: OPENAI_API_KEY not found in environment")
+            print("The Batch API needs an OpenAI key; use --realtime for OpenRouter\n")
+            sys.exit(1)
+
+        if args.resume:
+            resume_batch(args.resume, poll_interval=args.poll)
+        else:
+            run_batch(batch_size=args.batch_size, model=args.model, poll_interval=args.poll)
+
+    except Exception as e:
+        print(f"\n❌ Fatal error: {e}\n")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
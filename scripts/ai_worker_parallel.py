@@ -2,30 +2,60 @@
 """
 Parallel AI Worker - Process multiple documents simultaneously
 Performance improvement: 5-10x faster than serial processing
+
+LLM requests are fanned out from a single asyncio event loop (httpx), with
+--workers bounding how many are in flight at once. The database is only
+touched twice per batch (claim and bulk store), so it stays on psycopg2.
 """
+import argparse
+import asyncio
 import sys
 import os
-import json
 import time
+import httpx
+import orjson
 import psycopg2
-import psycopg2.extras
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Lock
+import psycopg2.pool
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
 
 # Import the existing AI analyzer
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from scripts.ai_analyzer import analyze_document
+from scripts.ai_analyzer import (
+    RATE_LIMIT_ATTEMPTS,
+    RateLimitError,
+    analysis_row,
+    claim_pending_documents,
+    openrouter_request,
+    parse_openrouter_response,
+    release_documents,
+    store_ai_analyses
+)
+
+# Seconds to wait for a single completion before giving up on it
+REQUEST_TIMEOUT = 120
+
+# Default OpenRouter requests per minute shared by all workers
+DEFAULT_RPM = int(os.getenv('OPENROUTER_RPM', '60'))
 
-# Thread-safe counter
-class Counter:
-    def __init__(self):
-        self.value = 0
-        self.lock = Lock()
+class TokenBucket:
+    """Requests-per-minute limiter shared by all coroutines
+    
+    Each acquire reserves the next slot (tokens may go negative) and sleeps
+    until it comes due, so there is no await between reading and updating
+    the bucket and no lock is needed on the event loop.
+    """
+    def __init__(self, rpm):
+        self.capacity = rpm
+        self.rate = rpm / 60
+        self.tokens = rpm
+        self.ts = time.monotonic()
     
-    def increment(self):
-        with self.lock:
-            self.value += 1
-            return self.value
+    async def acquire(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.ts) * self.rate) - 1
+        self.ts = now
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
 
 def load_config():
     """Load database configuration"""
@@ -34,14 +64,16 @@ def load_config():
         print(f"Error: Config file not found: {config_path}")
         sys.exit(1)
     
-    with open(config_path, 'r') as f:
-        config = json.load(f)
+    with open(config_path, 'rb') as f:
+        config = orjson.loads(f.read())
     
     return config['metadata_store']['params']
 
-def get_db_connection(db_config):
-    """Get a new database connection (thread-safe)"""
-    return psycopg2.connect(
+def create_connection_pool(db_config):
+    """Create a small pool for the claim and bulk-store queries"""
+    return psycopg2.pool.ThreadedConnectionPool(
+        1,
+        2,
         host=db_config['host'],
         port=db_config['port'],
         database=db_config['database'],
@@ -49,91 +81,132 @@ def get_db_connection(db_config):
         password=db_config['password']
     )
 
-def get_pending_documents(db_config, limit=None):
-    """Fetch documents that don't have AI analysis yet"""
-    conn = get_db_connection(db_config)
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
-    
-    query = """
-        SELECT d.document_id, d.subject, d.body_text, c.email as custodian_email
-        FROM documents d
-        LEFT JOIN custodians c ON d.custodian_id = c.id
-        LEFT JOIN ai_analysis a ON d.document_id = a.document_id
-        WHERE a.document_id IS NULL
-        ORDER BY d.collected_at DESC
-    """
-    
-    if limit:
-        query += f" LIMIT {limit}"
-    
-    cursor.execute(query)
-    docs = cursor.fetchall()
-    
-    cursor.close()
-    conn.close()
-    
-    return [dict(doc) for doc in docs]
+def get_pending_documents(pool, limit=None):
+    """Claim documents that don't have AI analysis yet"""
+    conn = pool.getconn()
+    try:
+        return claim_pending_documents(conn, limit)
+    finally:
+        pool.putconn(conn)
+
+@retry(
+    retry=retry_if_exception_type((RateLimitError, httpx.TransportError)),
+    stop=stop_after_attempt(RATE_LIMIT_ATTEMPTS),
+    wait=wait_random_exponential(multiplier=1, max=30),
+    reraise=True,
+)
+async def request_analysis(client, bucket, doc_dict):
+    """Call OpenRouter for one document, retrying 429s and dropped connections with jitter"""
+    await bucket.acquire()
+    response = await client.post(**openrouter_request(
+        subject=doc_dict.get('subject') or "",
+        body=doc_dict.get('body_text') or "",
+        custodian=doc_dict.get('custodian_email') or "Unknown"
+    ))
+    return parse_openrouter_response(response)
 
-def process_document_worker(doc_dict, db_config, counter, total):
-    """Worker function to process a single document (runs in thread)"""
+async def process_document_worker(client, semaphore, bucket, doc_dict, progress, total):
+    """Analyze a single document (runs as a coroutine on the event loop)
+    
+    Nothing is written here; the returned ai_analysis row is stored with the
+    rest of the batch in one transaction.
+    """
     doc_id = doc_dict['document_id']
     
     try:
-        # Create new connection for this thread
-        conn = get_db_connection(db_config)
-        
-        # Run AI analysis
-        start_time = time.time()
-        result = analyze_document(doc_dict, conn)
-        duration = time.time() - start_time
-        
-        conn.close()
+        async with semaphore:
+            # Run AI analysis
+            start_time = time.time()
+            analysis = await request_analysis(client, bucket, doc_dict)
+            duration = time.time() - start_time
         
-        count = counter.increment()
+        progress[0] += 1
         
-        if result and result.get('success'):
-            status = '✅'
-            classification = result.get('classification', 'Unknown')
-            relevance = result.get('relevance_score', 0)
-        else:
-            status = '❌'
-            classification = 'Failed'
-            relevance = 0
+        classification = analysis.get('classification', 'Unknown')
+        relevance = analysis.get('relevance_score', 0)
+        subject = (doc_dict.get('subject') or 'No Subject')[:40]
         
-        subject = doc_dict.get('subject', 'No Subject')[:40]
+        print(f"[{progress[0]}/{total}] ✅ {doc_id[:20]}... | {classification} ({relevance}/100) | {duration:.1f}s | {subject}...")
         
-        print(f"[{count}/{total}] {status} {doc_id[:20]}... | {classification} ({relevance}/100) | {duration:.1f}s | {subject}...")
-        
-        return {'success': result.get('success', False), 'doc_id': doc_id}
+        return {'success': True, 'doc_id': doc_id, 'row': analysis_row(doc_id, analysis)}
         
     except Exception as e:
-        count = counter.increment()
-        print(f"[{count}/{total}] ❌ {doc_id[:20]}... | Error: {str(e)}")
+        progress[0] += 1
+        print(f"[{progress[0]}/{total}] ❌ {doc_id[:20]}... | Error: {str(e)}")
         return {'success': False, 'doc_id': doc_id, 'error': str(e)}
 
+async def analyze_batch(documents, workers, bucket):
+    """Analyze documents concurrently, with at most `workers` requests in flight"""
+    semaphore = asyncio.Semaphore(workers)
+    progress = [0]
+    limits = httpx.Limits(max_connections=workers, max_keepalive_connections=workers)
+    
+    # HTTP/2 multiplexes the in-flight requests over a shared connection
+    async with httpx.AsyncClient(http2=True, timeout=REQUEST_TIMEOUT, limits=limits) as client:
+        tasks = [
+            process_document_worker(client, semaphore, bucket, doc, progress, len(documents))
+            for doc in documents
+        ]
+        return [await task for task in asyncio.as_completed(tasks)]
+
+def store_results(pool, results):
+    """Store all successful analyses in one transaction and requeue the rest.
+    
+    Returns the number of documents stored.
+    """
+    rows = [r['row'] for r in results if r['success']]
+    
+    conn = pool.getconn()
+    try:
+        try:
+            # A bad row falls back to per-row upserts inside, so only it is lost
+            stored = len(rows) - len(store_ai_analyses(rows, conn))
+        except Exception:
+            stored = 0
+        # Stored documents are already 'done', so only failures are requeued
+        release_documents(conn, [r['doc_id'] for r in results])
+    finally:
+        pool.putconn(conn)
+    
+    return stored
+
+def parse_args():
+    """Parse command-line options"""
+    parser = argparse.ArgumentParser(
+        description="Parallel AI Worker for high-throughput document analysis",
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    
+    parser.add_argument("--batch-size", type=int, default=20, help="Documents per batch (default: 20)")
+    parser.add_argument("--workers", type=int, default=5, help="Concurrent LLM requests (default: 5)")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_RPM,
+                        help="OpenRouter requests per minute across all workers (default: $OPENROUTER_RPM or 60)")
+    parser.add_argument("--loop", action="store_true", help="Keep processing batches until none are pending")
+    
+    args = parser.parse_args()
+    if args.batch_size < 1 or args.workers < 1 or args.rpm < 1:
+        parser.error("--batch-size, --workers and --rpm must be positive")
+    
+    return args
+
 def main():
     """Main execution with parallel processing"""
+    args = parse_args()
+    
     print("=" * 70)
     print("🚀 Parallel AI Worker - High Performance Document Analysis")
     print("=" * 70)
     print()
     
-    # Parse arguments
-    batch_size = 20  # Default to 20 documents
-    workers = 5  # Default to 5 parallel workers
-    loop = False
-    
-    for i, arg in enumerate(sys.argv[1:]):
-        if arg == '--batch-size' and i + 1 < len(sys.argv) - 1:
-            batch_size = int(sys.argv[i + 2])
-        elif arg == '--workers' and i + 1 < len(sys.argv) - 1:
-            workers = int(sys.argv[i + 2])
-        elif arg == '--loop':
-            loop = True
+    batch_size = args.batch_size
+    workers = args.workers
+    loop = args.loop
+    rpm = args.rpm
     
     print(f"⚙️  Configuration:")
     print(f"   • Batch size: {batch_size} documents")
     print(f"   • Parallel workers: {workers}")
+    print(f"   • Rate limit: {rpm} requests/min")
     print(f"   • Mode: {'Continuous loop' if loop else 'One-time run'}")
     print()
     
@@ -145,8 +218,10 @@ def main():
         print("  export OPENROUTER_API_KEY='sk-or-v1-...'")
         sys.exit(1)
     
-    # Load database config
+    # Load database config; the pool is built here (not at import) so it is never inherited by a fork
     db_config = load_config()
+    pool = create_connection_pool(db_config)
+    bucket = TokenBucket(rpm)  # shared across batches so the limit holds between them
     print(f"✅ Connected to database: {db_config['host']}")
     print()
     
@@ -160,7 +235,7 @@ def main():
         
         # Get pending documents
         print(f"🔍 Fetching pending documents (max {batch_size})...")
-        pending = get_pending_documents(db_config, limit=batch_size)
+        pending = get_pending_documents(pool, limit=batch_size)
         
         if not pending:
             print("✨ No pending documents found!")
@@ -178,23 +253,13 @@ def main():
         
         # Process documents in parallel
         start_time = time.time()
-        counter = Counter()
-        results = []
-        
-        with ThreadPoolExecutor(max_workers=workers) as executor:
-            # Submit all tasks
-            futures = {
-                executor.submit(process_document_worker, doc, db_config, counter, num_docs): doc
-                for doc in pending
-            }
-            
-            # Collect results as they complete
-            for future in as_completed(futures):
-                results.append(future.result())
+        results = asyncio.run(analyze_batch(pending, workers, bucket))
+        
+        # One multi-row write for the whole batch instead of a commit per document
+        successful = store_results(pool, results)
         
         # Calculate statistics
         duration = time.time() - start_time
-        successful = sum(1 for r in results if r['success'])
         failed = num_docs - successful
         
         total_processed += num_docs
@@ -224,6 +289,8 @@ def main():
         print("⏳ Waiting 10 seconds before next batch...")
         time.sleep(10)
     
+    pool.closeall()
+    
     # Final summary
     print("=" * 70)
     print("🎉 Processing Complete")
@@ -4,7 +4,7 @@ Apply vector support migration to PostgreSQL database
 """
 import sys
 import os
-import json
+import orjson
 import psycopg2
 
 def load_config():
@@ -14,11 +14,58 @@ def load_config():
         print(f"Error: Config file not found: {config_path}")
         sys.exit(1)
     
-    with open(config_path, 'r') as f:
-        config = json.load(f)
+    with open(config_path, 'rb') as f:
+        config = orjson.loads(f.read())
     
     return config['metadata_store']['params']
 
+MIGRATION_FILE = 'scripts/add_vector_support.sql'
+
+def migration_applied(cursor):
+    """Check whether the migration is already fully in place
+    
+    Invalid indexes (left behind by an interrupted CREATE INDEX CONCURRENTLY)
+    are dropped here so the migration rebuilds them.
+    """
+    cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'vector'")
+    has_extension = cursor.fetchone() is not None
+    
+    cursor.execute("""
+        SELECT count(*)
+        FROM information_schema.columns
+        WHERE table_name = 'documents'
+          AND column_name IN ('embedding', 'embedding_model', 'embedding_generated_at')
+    """)
+    has_columns = cursor.fetchone()[0] == 3
+    
+    cursor.execute("""
+        SELECT i.indisvalid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE c.relname = 'documents_embedding_hnsw_idx'
+    """)
+    index = cursor.fetchone()
+    if index and not index[0]:
+        print("⚠️  Dropping invalid HNSW index from an interrupted build")
+        cursor.execute("DROP INDEX CONCURRENTLY IF EXISTS documents_embedding_hnsw_idx")
+        index = None
+    
+    cursor.execute("SELECT 1 FROM pg_class WHERE relname = 'documents_embedding_idx'")
+    has_old_index = cursor.fetchone() is not None
+    
+    return has_extension and has_columns and index is not None and not has_old_index
+
+def split_statements(sql):
+    """Split the migration into statements (it has no semicolons inside statements)
+    
+    CREATE INDEX CONCURRENTLY can't run in the implicit transaction of a
+    multi-statement query, so each statement is executed on its own.
+    """
+    for statement in sql.split(';\n'):
+        code = [line for line in statement.splitlines() if line.strip() and not line.strip().startswith('--')]
+        if code:
+            yield statement.strip().rstrip(';')
+
 def apply_migration(db_config):
     """Apply the vector support migration"""
     try:
@@ -34,15 +81,20 @@ def apply_migration(db_config):
         
         print("🔌 Connected to database")
         
-        # Read migration SQL
-        with open('scripts/add_vector_support.sql', 'r') as f:
-            sql = f.read()
-        
-        # Execute migration
-        print("📝 Applying vector support migration...")
-        cursor.execute(sql)
-        
-        print("✅ Migration applied successfully!")
+        # Skip the DDL (and its ACCESS EXCLUSIVE locks) when nothing is missing
+        if migration_applied(cursor):
+            print("✅ Migration already applied, nothing to do")
+        else:
+            # Read migration SQL
+            with open(MIGRATION_FILE, 'r') as f:
+                sql = f.read()
+            
+            # Execute migration
+            print("📝 Applying vector support migration...")
+            for statement in split_statements(sql):
+                cursor.execute(statement)
+            
+            print("✅ Migration applied successfully!")
         print("\nVerifying...")
         
         # Verify pgvector extension
@@ -5,6 +5,8 @@ Create a realistic Enron load file package with actual email content.
 
 import json
 import hashlib
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
 import random
@@ -459,94 +461,136 @@ Contracts Team"""
     }
 ]
 
-def create_loadfile_package(output_dir: Path):
-    """Create a realistic Enron load file package."""
-    
-    output_dir.mkdir(parents=True, exist_ok=True)
-    text_dir = output_dir / "TEXT"
-    text_dir.mkdir(exist_ok=True)
+# DAT field delimiter (thorn, þ)
+DELIMITER = "þ"
+
+# DAT header row
+HEADERS = (
+    "DOCID",
+    "BATES_NUMBER",
+    "CUSTODIAN",
+    "DATE_SENT",
+    "SUBJECT",
+    "FROM",
+    "TO",
+    "CC",
+    "ATTACHMENT_COUNT",
+    "FILE_SIZE",
+    "FILE_TYPE",
+    "TEXT_PATH",
+    "MD5_HASH",
+    "SOURCE",
+)
+
+# Delimiter and line breaks become spaces in a single C-level pass
+_CLEAN_TABLE = str.maketrans({DELIMITER: " ", "\n": " ", "\r": " "})
+
+
+def clean_field(value):
+    """Clean up a field for the DAT (escape delimiters and newlines, collapse whitespace)."""
+    if not value:
+        return ""
+    return " ".join(str(value).translate(_CLEAN_TABLE).split())
+
+
+def _prepare(email):
+    """
+    Flatten an email to (from, to, date, subject, body) plus the DAT fields
+    derived from it (custodian, cleaned subject, from and to).
     
-    # DAT file header
-    dat_lines = []
-    delimiter = "þ"
+    The recipient list is joined once and shared by the TEXT body and the
+    DAT TO column.
+    """
+    to = ', '.join(email['to'])
+    return (
+        email['from'],
+        to,
+        email['date'],
+        email['subject'],
+        email['body'],
+        email['from'].partition('@')[0],
+        clean_field(email['subject']),
+        clean_field(email['from']),
+        clean_field(to),
+    )
+
+
+# The sample is static, so it is flattened once at import, and the loop
+# unpacks tuples rather than subscripting a dict per field
+_PREPARED = [_prepare(email) for email in REALISTIC_EMAILS]
+
+
+@functools.cache
+def _prepared_rows():
+    """
+    Build each email's (text_filename, body_bytes, file_size, dat_row) once,
+    with the DAT row already UTF-8 encoded.
     
-    headers = [
-        "DOCID",
-        "BATES_NUMBER",
-        "CUSTODIAN",
-        "DATE_SENT",
-        "SUBJECT",
-        "FROM",
-        "TO",
-        "CC",
-        "ATTACHMENT_COUNT",
-        "FILE_SIZE",
-        "FILE_TYPE",
-        "TEXT_PATH",
-        "MD5_HASH",
-        "SOURCE",
-    ]
-    dat_lines.append(delimiter.join(headers))
+    None of it depends on the output directory, so writing the package is
+    pure I/O and repeat calls in the same process reuse the rows.
+    """
+    rows = []
+    d = DELIMITER
     
-    for idx, email in enumerate(REALISTIC_EMAILS):
+    for idx, (frm, to, date, subj, body, custodian, subject, sender, recipients) in enumerate(_PREPARED):
         doc_id = f"ENRON{idx+1:06d}"
         bates = f"ENRON-PROD-{idx+1:08d}"
         
         # Create email body
-        body_text = f"""From: {email['from']}
-To: {', '.join(email['to'])}
-Date: {email['date']}
-Subject: {email['subject']}
+        body_text = f"""From: {frm}
+To: {to}
+Date: {date}
+Subject: {subj}
 
-{email['body']}
+{body}
 """
         
-        # Write text file
+        # Encode once; the bytes are reused for the text file, size and hash
+        body_bytes = body_text.encode('utf-8')
         text_filename = f"{doc_id}.txt"
-        text_file_path = text_dir / text_filename
-        with open(text_file_path, 'w', encoding='utf-8') as f:
-            f.write(body_text)
-        
-        file_size = len(body_text.encode('utf-8'))
-        md5_hash = hashlib.md5(body_text.encode('utf-8')).hexdigest()
-        
-        # Build DAT row
-        def clean_field(value):
-            if not value:
-                return ""
-            value = str(value).replace(delimiter, " ")
-            value = value.replace("\n", " ").replace("\r", " ")
-            value = value.replace("  ", " ").strip()
-            return value
+        file_size = len(body_bytes)
+        md5_hash = hashlib.md5(body_bytes, usedforsecurity=False).hexdigest()
         
-        row = [
-            doc_id,
-            bates,
-            email['from'].split('@')[0],  # custodian
-            email['date'],
-            clean_field(email['subject']),
-            clean_field(email['from']),
-            clean_field(', '.join(email['to'])),
-            '',  # CC
-            '0',  # attachment count
-            str(file_size),
-            "Email",
-            f"TEXT/{text_filename}",
-            md5_hash,
-            "Enron Email Archive - Realistic Sample",
-        ]
+        # Build DAT row. Fixed 14 columns: CC is empty and ATTACHMENT_COUNT is always 0
+        dat_row = (
+            f"\n{doc_id}{d}{bates}{d}{custodian}{d}{date}{d}{subject}{d}{sender}"
+            f"{d}{recipients}{d}{d}0{d}{file_size}{d}Email{d}TEXT/{text_filename}"
+            f"{d}{md5_hash}{d}Enron Email Archive - Realistic Sample"
+        ).encode('utf-8')
         
-        dat_lines.append(delimiter.join(row))
+        rows.append((text_filename, body_bytes, file_size, dat_row))
     
-    # Write DAT file
+    return tuple(rows)
+
+
+def create_loadfile_package(output_dir: Path):
+    """Create a realistic Enron load file package."""
+    
+    output_dir.mkdir(parents=True, exist_ok=True)
+    text_dir = output_dir / "TEXT"
+    text_dir.mkdir(exist_ok=True)
+    
+    # Pre-encoded rows are streamed to the DAT in binary mode (no TextIOWrapper);
+    # TEXT files are written on a thread pool (file writes release the GIL)
     dat_file = output_dir / "ENRON_REALISTIC.DAT"
-    with open(dat_file, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(dat_lines))
+    writes = []
+    total_bytes = 0
+    with ThreadPoolExecutor() as pool, open(dat_file, 'wb') as dat_fh:
+        dat_fh.write(DELIMITER.join(HEADERS).encode('utf-8'))
+        
+        for text_filename, body_bytes, file_size, dat_row in _prepared_rows():
+            writes.append(pool.submit((text_dir / text_filename).write_bytes, body_bytes))
+            dat_fh.write(dat_row)
+            total_bytes += file_size
+    
+    # Surface any write error
+    for write in writes:
+        write.result()
     
     print(f"\n✅ Created realistic Enron load file package!")
     print(f"   📄 DAT file: {dat_file}")
     print(f"   📁 TEXT files: {text_dir} ({len(REALISTIC_EMAILS)} files)")
-    print(f"   📊 Total size: {sum(f.stat().st_size for f in text_dir.glob('*.txt')) / 1024:.1f} KB")
+    print(f"   📊 Total size: {total_bytes / 1024:.1f} KB")
     print(f"\n🎯 These are REALISTIC Enron emails with actual subjects and content!")
     
     return dat_file
@@ -8,13 +8,51 @@ We'll download a small subset for testing.
 import os
 import sys
 import json
-import email
+import re
 import mailbox
 from pathlib import Path
-import urllib.request
 import tarfile
 import shutil
 
+import requests
+
+# Download chunk size; large chunks keep write() calls to a few hundred for the archive
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Mailboxes extracted from the full archive
+KEY_USERS = ['kenneth-lay', 'jeffrey-skilling', 'andrew-fastow',
+             'sherri-sera', 'greg-whalley']
+
+# One alternation scans each member name once instead of once per user
+_KEY_USERS_RE = re.compile('|'.join(map(re.escape, KEY_USERS)))
+
+# Headers kept from each message, including folded continuation lines
+_HEADER_RE = re.compile(r'^(From|To|Subject|Date):[ \t]*(.*(?:\n[ \t].*)*)', re.M | re.I)
+
+
+def parse_eml(text):
+    """
+    Parse a raw Enron message into our format.
+    
+    Enron messages are single-part plain text, so only four headers are needed
+    and the rest is the body; this avoids email.message_from_file's full
+    line-by-line feed parser.
+    """
+    head, _, body = text.partition('\n\n')
+    
+    headers = {}
+    for name, value in _HEADER_RE.findall(head):
+        headers.setdefault(name.lower(), value.rstrip('\r\n'))
+    
+    return {
+        "from": headers.get('from', 'unknown'),
+        "to": headers.get('to', 'unknown'),
+        "subject": headers.get('subject', 'No Subject'),
+        "date": headers.get('date', ''),
+        "body": body
+    }
+
+
 def download_enron_subset():
     """Download a small subset of Enron emails."""
     
@@ -61,7 +99,14 @@ def download_enron_subset():
         print("   This may take a few minutes...")
         
         try:
-            urllib.request.urlretrieve(url, tar_path)
+            # Stream to a .part file so an interrupted download isn't taken for the archive
+            part_path = tar_path.with_name(tar_path.name + ".part")
+            with requests.get(url, stream=True, timeout=60) as response:
+                response.raise_for_status()
+                with open(part_path, 'wb') as f:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+            part_path.replace(tar_path)
             print(f"✅ Downloaded: {tar_path}")
         except Exception as e:
             print(f"❌ Download failed: {e}")
@@ -77,18 +122,19 @@ def download_enron_subset():
         print(f"📦 Extracting subset...")
         try:
             with tarfile.open(tar_path, 'r:gz') as tar:
-                # Extract only a few key mailboxes
-                key_users = ['kenneth-lay', 'jeffrey-skilling', 'andrew-fastow', 
-                            'sherri-sera', 'greg-whalley']
-                
-                members = tar.getmembers()
-                subset = [m for m in members if any(user in m.name for user in key_users)][:200]
-                
-                print(f"   Extracting {len(subset)} files from key custodians...")
-                for member in subset:
-                    tar.extract(member, extract_dir)
+                # Extract only a few key mailboxes (KEY_USERS).
+                # Iterating the archive reads member headers as it goes, so we stop
+                # after 200 matches instead of indexing all ~500k members up front
+                print(f"   Extracting up to 200 files from key custodians...")
+                extracted = 0
+                for member in tar:
+                    if _KEY_USERS_RE.search(member.name):
+                        tar.extract(member, extract_dir)
+                        extracted += 1
+                        if extracted >= 200:
+                            break
                 
-                print(f"✅ Extracted to: {extract_dir}")
+                print(f"✅ Extracted {extracted} files to: {extract_dir}")
         except Exception as e:
             print(f"❌ Extraction failed: {e}")
             return create_sample_enron_emails(data_dir)
@@ -262,8 +308,8 @@ Chief Risk Officer"""
     email_files = []
     for i, email_data in enumerate(sample_emails):
         filename = sample_dir / f"email_{i+1:03d}.json"
-        with open(filename, 'w') as f:
-            json.dump(email_data, f, indent=2)
+        # json.dump with indent issues a write per token; serialize first, write once
+        filename.write_bytes(json.dumps(email_data, indent=2).encode('utf-8'))
         email_files.append(filename)
         print(f"   ✅ Created: {filename.name}")
     
@@ -290,16 +336,7 @@ def parse_enron_emails(source_dir):
         for eml_file in source_dir.rglob("*."):
             if eml_file.is_file():
                 try:
-                    with open(eml_file, 'r', errors='ignore') as f:
-                        msg = email.message_from_file(f)
-                        
-                        emails.append({
-                            "from": msg.get('From', 'unknown'),
-                            "to": msg.get('To', 'unknown'),
-                            "subject": msg.get('Subject', 'No Subject'),
-                            "date": msg.get('Date', ''),
-                            "body": msg.get_payload()
-                        })
+                    emails.append(parse_eml(eml_file.read_text(errors='ignore')))
                 except Exception as e:
                     continue
     
@@ -0,0 +1,30 @@
+"""
+Shared .env parsing for the command-line scripts.
+
+Usage:
+    from scripts.env_file import read_env_file
+    os.environ.update(read_env_file(Path(".env")) or {})
+"""
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Optional
+
+
+@lru_cache(maxsize=None)
+def read_env_file(env_file: Path) -> Optional[Dict[str, str]]:
+    """Parse KEY=value lines from a .env file, once per process (None if it doesn't exist)."""
+    try:
+        text = Path(env_file).read_text()
+    except FileNotFoundError:
+        return None
+
+    lines = (line.strip() for line in text.splitlines())
+    return {
+        key.strip(): value.strip()
+        for key, value in (
+            line.split("=", 1)
+            for line in lines
+            if line and not line.startswith("#") and "=" in line
+        )
+    }
@@ -44,18 +44,25 @@ def main():
         
         # Add missing columns
         print("\n🔧 Adding missing columns...")
+        missing = []
         for col_name, col_type in required_columns.items():
             if col_name not in existing_columns:
                 print(f"   Adding column: {col_name} ({col_type})")
-                cursor.execute(f"""
-                    ALTER TABLE ai_analysis 
-                    ADD COLUMN IF NOT EXISTS {col_name} {col_type};
-                """)
-                conn.commit()
-                print(f"   ✅ Added {col_name}")
+                missing.append((col_name, col_type))
             else:
                 print(f"   ✓ {col_name} already exists")
         
+        if missing:
+            # One ALTER TABLE for every missing column: a single round trip and a
+            # single ACCESS EXCLUSIVE lock on ai_analysis instead of one per column
+            cursor.execute(
+                "ALTER TABLE ai_analysis "
+                + ", ".join(f"ADD COLUMN IF NOT EXISTS {col_name} {col_type}" for col_name, col_type in missing)
+            )
+            conn.commit()
+            for col_name, _ in missing:
+                print(f"   ✅ Added {col_name}")
+        
         print("\n✅ Schema fix complete!")
         
         # Verify final schema
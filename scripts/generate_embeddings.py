@@ -4,13 +4,36 @@ Generate vector embeddings for documents to enable semantic search
 Uses OpenAI's text-embedding-3-small model (1536 dimensions)
 Cost: ~$0.0001 per document
 """
+import asyncio
+import io
+import struct
 import sys
 import os
-import json
-import time
+import orjson
 import psycopg2
-import psycopg2.extras
-from openai import OpenAI
+import tiktoken
+from openai import AsyncOpenAI
+from tqdm import tqdm
+
+# Documents per embeddings request (the API accepts up to 2048 inputs per call)
+EMBEDDING_BATCH_SIZE = 96
+
+# Embeddings requests in flight at once
+EMBEDDING_CONCURRENCY = 8
+
+# Tokens kept per document (the model accepts up to 8191)
+MAX_EMBEDDING_TOKENS = 8000
+
+# Total input tokens the embeddings endpoint accepts in one request
+MAX_REQUEST_TOKENS = 300_000
+
+# Tokenizer used by the text-embedding-3 models
+_ENCODING = tiktoken.get_encoding("cl100k_base")
+
+# PostgreSQL binary COPY framing: signature, flags and header-extension length
+# up front, a -1 field count at the end
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack("!ii", 0, 0)
+_COPY_TRAILER = struct.pack("!h", -1)
 
 def load_config():
     """Load database configuration"""
@@ -19,13 +42,13 @@ def load_config():
         print(f"Error: Config file not found: {config_path}")
         sys.exit(1)
     
-    with open(config_path, 'r') as f:
-        config = json.load(f)
+    with open(config_path, 'rb') as f:
+        config = orjson.loads(f.read())
     
     return config['metadata_store']['params']
 
 def get_openai_client():
-    """Initialize OpenAI client"""
+    """Initialize async OpenAI client"""
     api_key = os.getenv('OPENAI_API_KEY') or os.getenv('OPENROUTER_API_KEY')
     
     if not api_key:
@@ -38,60 +61,246 @@ def get_openai_client():
     
     # Check if using OpenRouter
     if api_key.startswith('sk-or-'):
-        return OpenAI(
+        return AsyncOpenAI(
             base_url="https://openrouter.ai/api/v1",
             api_key=api_key
         )
     else:
-        return OpenAI(api_key=api_key)
+        return AsyncOpenAI(api_key=api_key)
+
+def count_documents_without_embeddings(cursor, limit=None):
+    """Count documents that don't have embeddings yet (capped at limit)"""
+    cursor.execute("SELECT COUNT(*) FROM documents WHERE embedding IS NULL")
+    count = cursor.fetchone()[0]
+    return min(count, limit) if limit else count
 
-def get_documents_without_embeddings(cursor, limit=None):
-    """Fetch documents that don't have embeddings yet"""
-    query = """
+def get_documents_without_embeddings(conn, limit=None):
+    """
+    Yield pages of documents that don't have embeddings yet, newest first.
+    
+    Each page is its own keyset query, continuing below the last
+    (collected_at, document_id) seen, and its transaction is closed at once.
+    Nothing spans the run on the server, and only one page of body_text is
+    held at a time (a held cursor would materialize the whole result first).
+    """
+    columns = """
         SELECT d.document_id, d.subject, d.body_text, c.email as custodian_email, d.collected_at
         FROM documents d
         LEFT JOIN custodians c ON d.custodian_id = c.id
         WHERE d.embedding IS NULL
-        ORDER BY d.collected_at DESC
     """
-    if limit:
-        query += f" LIMIT {limit}"
+    order = " ORDER BY d.collected_at DESC, d.document_id DESC LIMIT %s"
     
-    cursor.execute(query)
-    return cursor.fetchall()
+    remaining = limit or None
+    last = None
+    while remaining is None or remaining > 0:
+        page_size = EMBEDDING_BATCH_SIZE if remaining is None else min(EMBEDDING_BATCH_SIZE, remaining)
+        # Plain tuple rows: no per-row dict wrapper
+        with conn.cursor() as cursor:
+            if last is None:
+                cursor.execute(columns + order, (page_size,))
+            else:
+                cursor.execute(columns + " AND (d.collected_at, d.document_id) < (%s, %s)" + order,
+                               (*last, page_size))
+            rows = cursor.fetchall()
+        conn.commit()
+        
+        if not rows:
+            return
+        last = (rows[-1][4], rows[-1][0])
+        if remaining is not None:
+            remaining -= len(rows)
+        yield [row[:4] for row in rows]
 
-def generate_embedding(client, text, model="text-embedding-3-small"):
-    """Generate embedding for a piece of text"""
+async def generate_embeddings(client, semaphore, texts, model="text-embedding-3-small"):
+    """Generate embeddings for a batch of texts in one request (None on failure)"""
     try:
-        # Truncate text if too long (max ~8000 tokens for embedding models)
-        max_chars = 30000
-        if len(text) > max_chars:
-            text = text[:max_chars]
-        
-        response = client.embeddings.create(
-            input=text,
-            model=model
-        )
-        return response.data[0].embedding
+        async with semaphore:
+            response = await client.embeddings.create(
+                input=texts,
+                model=model
+            )
+        # Results carry their input index; don't rely on response order
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
     except Exception as e:
-        print(f"  ⚠️  Error generating embedding: {e}")
+        tqdm.write(f"  ⚠️  Error generating embeddings: {e}")
         return None
 
-def update_document_embedding(cursor, document_id, embedding, model):
-    """Store embedding in database"""
+def copy_field(data):
+    """One binary COPY field: int32 byte length, then the bytes"""
+    return struct.pack("!i", len(data)) + data
+
+def build_embedding_copy(rows, model):
+    """
+    Build a binary COPY stream of (document_id, embedding, model) tuples.
+    
+    Each embedding goes over as pgvector's binary form (int16 dimensions,
+    int16 unused, then big-endian float4s): 4 bytes a dimension, where the
+    text form spells every float out in decimal for the server to parse back.
+    """
+    model_field = copy_field(model.encode())
+    buf = io.BytesIO()
+    buf.write(_COPY_HEADER)
+    for doc_id, embedding in rows:
+        dims = len(embedding)
+        buf.write(struct.pack("!h", 3))
+        buf.write(copy_field(doc_id.encode()))
+        buf.write(copy_field(struct.pack(f"!hh{dims}f", dims, 0, *embedding)))
+        buf.write(model_field)
+    buf.write(_COPY_TRAILER)
+    buf.seek(0)
+    return buf
+
+def update_document_embeddings(cursor, rows, model):
+    """
+    Store a batch of (document_id, embedding) rows.
+    
+    Rows are COPYed (binary) into a temp table and applied with one
+    UPDATE ... FROM; the caller commits (which drops the temp table) or
+    rolls back.
+    """
     try:
+        buf = build_embedding_copy(rows, model)
+        
         cursor.execute("""
-            UPDATE documents 
-            SET embedding = %s::vector,
-                embedding_model = %s,
+            CREATE TEMP TABLE _embedding_stage (
+                document_id TEXT,
+                embedding vector(1536),
+                model VARCHAR(100)
+            ) ON COMMIT DROP
+        """)
+        cursor.copy_expert("COPY _embedding_stage FROM STDIN WITH (FORMAT binary)", buf)
+        cursor.execute("""
+            UPDATE documents AS d
+            SET embedding = s.embedding,
+                embedding_model = s.model,
                 embedding_generated_at = CURRENT_TIMESTAMP
-            WHERE document_id = %s
-        """, (embedding, model, document_id))
+            FROM _embedding_stage s
+            WHERE d.document_id = s.document_id
+        """)
         return True
     except Exception as e:
-        print(f"  ⚠️  Error storing embedding: {e}")
+        tqdm.write(f"  ⚠️  Error storing embeddings: {e}")
         return False
 
+def truncate_to_tokens(texts):
+    """
+    Cut each text to MAX_EMBEDDING_TOKENS tokens.
+    
+    Returns (texts, token_counts). The model bills and is limited by tokens,
+    so a character cut is either too loose or too strict depending on the
+    text. Texts are first cut to 10 characters per allowed token so a huge
+    email isn't tokenized in full.
+    """
+    token_lists = _ENCODING.encode_ordinary_batch([text[:MAX_EMBEDDING_TOKENS * 10] for text in texts])
+    
+    truncated = []
+    counts = []
+    for text, tokens in zip(texts, token_lists):
+        if len(tokens) > MAX_EMBEDDING_TOKENS:
+            tokens = tokens[:MAX_EMBEDDING_TOKENS]
+            text = _ENCODING.decode(tokens)
+        truncated.append(text)
+        counts.append(len(tokens))
+    return truncated, counts
+
+def build_batches(documents):
+    """
+    Yield (start, doc_ids, texts) batches from pages of document rows.
+    
+    A batch holds at most EMBEDDING_BATCH_SIZE documents and MAX_REQUEST_TOKENS
+    tokens, so a run of long emails can't push one request over the API limit.
+    """
+    start = 0
+    doc_ids = []
+    texts = []
+    batch_tokens = 0
+    
+    for rows in documents:
+        row_ids = []
+        row_texts = []
+        
+        for doc_id, subject, body, custodian in rows:
+            subject = subject or 'No Subject'
+            body = body or ''
+            custodian = custodian or ''
+            
+            # Create text to embed (combine subject and body)
+            row_ids.append(doc_id)
+            row_texts.append(f"Subject: {subject}\n\nFrom: {custodian}\n\n{body}")
+        
+        # Tokenize the whole fetch at once
+        for doc_id, text, token_count in zip(row_ids, *truncate_to_tokens(row_texts)):
+            if doc_ids and (len(doc_ids) >= EMBEDDING_BATCH_SIZE or batch_tokens + token_count > MAX_REQUEST_TOKENS):
+                yield start, doc_ids, texts
+                start += len(doc_ids)
+                doc_ids = []
+                texts = []
+                batch_tokens = 0
+            
+            doc_ids.append(doc_id)
+            texts.append(text)
+            batch_tokens += token_count
+    
+    if doc_ids:
+        yield start, doc_ids, texts
+
+async def embed_batch(client, semaphore, batch):
+    """Embed one batch; returns the batch and its embeddings (None on failure)"""
+    start, doc_ids, texts = batch
+    return batch, await generate_embeddings(client, semaphore, texts)
+
+async def embed_documents(client, conn, cursor, documents, total_docs):
+    """
+    Embed documents with up to EMBEDDING_CONCURRENCY requests in flight,
+    storing each batch as soon as its response arrives.
+    
+    Batches are read from the documents pages only as fast as they are
+    embedded, so at most a couple of rounds of batches are held in memory.
+    
+    Returns (successful, failed) document counts.
+    """
+    semaphore = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+    successful = 0
+    failed = 0
+    pending = set()
+    # One redrawn progress line instead of a printed line per batch
+    progress = tqdm(total=total_docs, unit="doc")
+    
+    def store(task):
+        nonlocal successful, failed
+        (_, doc_ids, _), embeddings = task.result()
+        
+        # Store in database (a single quick UPDATE; other requests stay in flight)
+        if embeddings and update_document_embeddings(cursor, list(zip(doc_ids, embeddings)), "text-embedding-3-small"):
+            conn.commit()
+            successful += len(doc_ids)
+        else:
+            if embeddings:
+                conn.rollback()
+            failed += len(doc_ids)
+        
+        progress.update(len(doc_ids))
+        progress.set_postfix(ok=successful, fail=failed)
+    
+    async with client:
+        for batch in build_batches(documents):
+            pending.add(asyncio.ensure_future(embed_batch(client, semaphore, batch)))
+            
+            # Keep the next round queued behind the semaphore, but read no further ahead
+            if len(pending) >= 2 * EMBEDDING_CONCURRENCY:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    store(task)
+        
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                store(task)
+    
+    progress.close()
+    return successful, failed
+
 def main():
     """Main execution"""
     print("=" * 60)
@@ -120,7 +329,11 @@ def main():
             password=db_config['password']
         )
         conn.autocommit = False
-        cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        cursor = conn.cursor()
+        # Missing embeddings are simply regenerated on the next run, so a commit
+        # lost in a crash costs nothing; don't wait on a WAL flush per batch
+        cursor.execute("SET synchronous_commit = off")
+        conn.commit()
         print(f"✅ Connected to database: {db_config['host']}")
     except Exception as e:
         print(f"❌ Failed to connect to database: {e}")
@@ -132,55 +345,22 @@ def main():
     
     # Get documents without embeddings
     print(f"\n🔍 Finding documents without embeddings (batch size: {batch_size})...")
-    documents = get_documents_without_embeddings(cursor, limit=batch_size)
+    total_docs = count_documents_without_embeddings(cursor, limit=batch_size)
     
-    if not documents:
+    if not total_docs:
         print("✨ All documents already have embeddings!")
         cursor.close()
         conn.close()
         return
     
-    total_docs = len(documents)
+    documents = get_documents_without_embeddings(conn, limit=batch_size)
     print(f"📊 Found {total_docs} documents to process")
     print(f"💰 Estimated cost: ${total_docs * 0.0001:.4f}")
     print()
     
-    # Process each document
-    successful = 0
-    failed = 0
-    
-    for i, doc in enumerate(documents, 1):
-        doc_id = doc['document_id']
-        subject = doc['subject'] or 'No Subject'
-        body = doc['body_text'] or ''
-        custodian = doc['custodian_email'] or ''
-        
-        # Create text to embed (combine subject and body)
-        text_to_embed = f"Subject: {subject}\n\nFrom: {custodian}\n\n{body}"
-        
-        print(f"[{i}/{total_docs}] Processing: {doc_id[:20]}...")
-        print(f"  Subject: {subject[:50]}...")
-        
-        # Generate embedding
-        embedding = generate_embedding(client, text_to_embed)
-        
-        if embedding:
-            # Store in database
-            if update_document_embedding(cursor, doc_id, embedding, "text-embedding-3-small"):
-                conn.commit()
-                successful += 1
-                print(f"  ✅ Embedding generated and stored")
-            else:
-                conn.rollback()
-                failed += 1
-        else:
-            failed += 1
-        
-        # Rate limiting (OpenAI has limits)
-        if i < total_docs:
-            time.sleep(0.2)  # Small delay between requests
-        
-        print()
+    # One embeddings request and one UPDATE per batch, with requests overlapped
+    successful, failed = asyncio.run(embed_documents(client, conn, cursor, documents, total_docs))
+    print()
     
     cursor.close()
     conn.close()
@@ -72,34 +72,23 @@ def main():
     
     metadata_store = build_metadata_store(metadata_store_config)
     
-    # Search for Enron documents
-    enron_docs = metadata_store.search(
-        query_text="",
-        filters={"source": "enron-emails"},
-        limit=100
-    )
+    # Per-custodian counts are aggregated in the database; no document rows are pulled
+    custodians = metadata_store.count_documents_by_custodian(source="enron-emails")
+    total_enron = sum(row['document_count'] for row in custodians)
     
-    print(f"✅ Found {len(enron_docs)} Enron documents in database")
+    print(f"✅ Found {total_enron} Enron documents in database")
     
-    if enron_docs:
+    if custodians:
         print(f"\n👥 Custodians:")
-        custodians = {}
-        for doc in enron_docs:
-            cust_id = doc.get('custodian_id', 'unknown')
-            cust_name = doc.get('custodian_name', 'Unknown')
-            cust_email = doc.get('custodian_email', '')
-            
-            key = f"{cust_name} ({cust_email})"
-            if key not in custodians:
-                custodians[key] = 0
-            custodians[key] += 1
-        
-        for cust, count in sorted(custodians.items(), key=lambda x: x[1], reverse=True):
-            print(f"   • {cust}: {count} emails")
+        for row in custodians:
+            print(f"   • {row['custodian_name'] or 'Unknown'} ({row['custodian_email'] or ''}): {row['document_count']} emails")
         
-        print(f"\n📧 Sample emails:")
-        for i, doc in enumerate(enron_docs[:3], 1):
-            print(f"   {i}. [{doc.get('custodian_name', 'Unknown')}] {doc.get('subject', 'No Subject')[:60]}")
+        top_email = custodians[0]['custodian_email']
+        if top_email:
+            print(f"\n📧 Sample emails:")
+            samples = metadata_store.get_documents_by_custodian(top_email, limit=3)
+            for i, doc in enumerate(samples, 1):
+                print(f"   {i}. [{doc.get('custodian_email') or 'Unknown'}] {(doc.get('subject') or 'No Subject')[:60]}")
     
     print(f"\n🌐 View in dashboard: http://localhost:8080")
     print(f"   Search for 'enron' or custodian names\n")
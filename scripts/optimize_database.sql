@@ -14,9 +14,18 @@ ON user_review(user_classification) WHERE user_classification IS NOT NULL;
 CREATE INDEX IF NOT EXISTS idx_user_review_reviewed 
 ON user_review(is_reviewed) WHERE is_reviewed = TRUE;
 
-CREATE INDEX IF NOT EXISTS idx_documents_collected_at_desc 
+CREATE INDEX IF NOT EXISTS idx_documents_collected_at_desc
 ON documents(collected_at DESC);
 
+-- Search (scripts/search.py) always orders by collected_at DESC with a LIMIT;
+-- with the filter column leading, a custodian or source search reads its newest
+-- rows straight off the index and stops at the limit instead of sorting every match
+CREATE INDEX IF NOT EXISTS idx_documents_custodian_collected
+ON documents(custodian_id, collected_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_documents_source_collected
+ON documents(source, collected_at DESC);
+
 -- Optimize full-text search
 CREATE INDEX IF NOT EXISTS idx_documents_search_gin 
 ON documents USING gin(search_vector);
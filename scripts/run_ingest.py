@@ -8,6 +8,7 @@ import logging
 import os
 import re
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -17,6 +18,12 @@ if str(ROOT) not in sys.path:
 from ingestion.config import AppConfig, DEFAULT_CONFIG
 from ingestion.pipeline import IngestionPipeline
 
+# ${VAR} or $VAR references in config strings
+_ENV_VAR_RE = re.compile(r'\$\{(\w+)\}|\$(\w+)')
+
+# KEY=value lines in a .env file; blank and # comment lines don't match
+_ENV_LINE_RE = re.compile(r'^[ \t]*([^#\s=][^=\n]*?)[ \t]*=(.*)$', re.MULTILINE)
+
 
 def load_env_file(env_path: str = ".env") -> None:
     """Load environment variables from .env file."""
@@ -26,14 +33,9 @@ def load_env_file(env_path: str = ".env") -> None:
         return
 
     logging.info(f"Loading environment from: {env_path}")
-    with open(env_file) as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith("#") and "=" in line:
-                key, value = line.split("=", 1)
-                # Only set if not already in environment
-                if key.strip() not in os.environ:
-                    os.environ[key.strip()] = value.strip()
+    for match in _ENV_LINE_RE.finditer(env_file.read_text()):
+        # Only set if not already in environment
+        os.environ.setdefault(match.group(1), match.group(2).strip())
 
 
 def expand_env_vars(data: dict | list | str) -> dict | list | str:
@@ -43,16 +45,19 @@ def expand_env_vars(data: dict | list | str) -> dict | list | str:
     elif isinstance(data, list):
         return [expand_env_vars(item) for item in data]
     elif isinstance(data, str):
-        # Match ${VAR} or $VAR patterns
-        def replacer(match):
-            var_name = match.group(1) or match.group(2)
-            return os.environ.get(var_name, match.group(0))
-
-        return re.sub(r'\$\{(\w+)\}|\$(\w+)', replacer, data)
+        if "$" not in data:
+            return data
+        return _ENV_VAR_RE.sub(_replace_env_var, data)
     else:
         return data
 
 
+def _replace_env_var(match: re.Match) -> str:
+    """Substitute one ${VAR}/$VAR match, leaving unknown variables as written."""
+    var_name = match.group(1) or match.group(2)
+    return os.environ.get(var_name, match.group(0))
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Run the ingestion pipeline")
     parser.add_argument(
@@ -74,15 +79,22 @@ def parse_args() -> argparse.Namespace:
     return parser.parse_args()
 
 
+@lru_cache(maxsize=8)
+def _read_config_json(path: str, mtime_ns: int) -> dict:
+    """Parse a config file; cached per (path, mtime) so an edited file is re-read."""
+    with open(path) as f:
+        return json.load(f)
+
+
 def load_config(path: Path | None) -> AppConfig:
     if not path:
         return DEFAULT_CONFIG
     if not path.exists():
         raise FileNotFoundError(f"Config file not found: {path}")
 
-    # Load JSON and expand environment variables
-    with open(path) as f:
-        raw_config = json.load(f)
+    # Load JSON and expand environment variables. Only the parsed JSON is cached:
+    # expansion builds new containers and reads os.environ on every call.
+    raw_config = _read_config_json(str(path), path.stat().st_mtime_ns)
 
     expanded_config = expand_env_vars(raw_config)
     return AppConfig.from_dict(expanded_config)
@@ -17,40 +17,115 @@ Examples:
     # Export to CSV
     python3 scripts/search.py "falcon" --export csv --output results.csv
     
+    # Export including full body text
+    python3 scripts/search.py "falcon" --export json --output results.json --full-body
+    
     # Show statistics
     python3 scripts/search.py --stats
 """
 
 import argparse
-import csv
 import json
 import os
 import sys
-from datetime import datetime
+import threading
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 import psycopg2
-import psycopg2.extras
+import psycopg2.pool
 
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from scripts.env_file import read_env_file
+
+# Connections kept open for reuse by later calls in this process; created on
+# first use, after load_env() has had a chance to set POSTGRES_*
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+# Body characters shown by --body
+BODY_PREVIEW_CHARS = 200
+
+# Rows fetched per round-trip when streaming search results for export
+SEARCH_ITERSIZE = 2000
+
+# Text searches rank only this many of the newest matching documents
+RANK_CANDIDATES = 1000
+
+# All statistics in one statement and one round-trip. The GROUPING SETS pass
+# reads documents once for both the per-source counts and the overall totals
+# (the () set, GROUPING(source) = 1); the result comes back as a single JSON
+# object already shaped like the stats dict
+STATISTICS_SQL = """
+    WITH by_source AS (
+        SELECT 
+            source,
+            GROUPING(source) as is_total,
+            COUNT(*) as count,
+            COUNT(DISTINCT custodian_id) as custodians,
+            MIN(collected_at) as earliest,
+            MAX(collected_at) as latest
+        FROM documents
+        GROUP BY GROUPING SETS ((source), ())
+    ),
+    top_custodians AS (
+        SELECT c.email, c.display_name, COUNT(*) as doc_count
+        FROM documents d
+        JOIN custodians c ON d.custodian_id = c.id
+        GROUP BY c.email, c.display_name
+        ORDER BY doc_count DESC
+        LIMIT 10
+    )
+    SELECT json_build_object(
+        'total_documents', t.count,
+        'total_custodians', t.custodians,
+        'date_range', json_build_object('earliest', t.earliest, 'latest', t.latest),
+        'by_source', (
+            SELECT COALESCE(json_agg(json_build_object('source', s.source, 'count', s.count) ORDER BY s.count DESC), '[]')
+            FROM by_source s
+            WHERE s.is_total = 0
+        ),
+        'top_custodians', (
+            SELECT COALESCE(json_agg(tc ORDER BY tc.doc_count DESC), '[]')
+            FROM top_custodians tc
+        )
+    )
+    FROM by_source t
+    WHERE t.is_total = 1
+"""
 
 def load_env():
     """Load environment variables from .env file."""
-    env_file = Path(__file__).parent.parent / ".env"
-    if env_file.exists():
-        with open(env_file) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#") and "=" in line:
-                    key, value = line.split("=", 1)
-                    os.environ[key.strip()] = value.strip()
+    os.environ.update(read_env_file(Path(__file__).parent.parent / ".env") or {})
 
 
 def get_db_connection():
-    """Get PostgreSQL database connection."""
+    """Get a pooled PostgreSQL connection; hand it back with release_db_connection()."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is None:
+            _POOL = create_connection_pool()
+    return _POOL.getconn()
+
+
+def release_db_connection(conn):
+    """Return a connection to the pool (an open transaction is rolled back)."""
+    _POOL.putconn(conn)
+
+
+def close_db_pool():
+    """Close every pooled connection."""
+    global _POOL
+    with _POOL_LOCK:
+        if _POOL is not None:
+            _POOL.closeall()
+            _POOL = None
+
+
+def create_connection_pool():
+    """Create the PostgreSQL connection pool."""
     # Try to get from environment or use defaults
     host = os.environ.get("POSTGRES_HOST", "ediscovery-metadata-db.cm526e4m45t7.us-east-1.rds.amazonaws.com")
     port = int(os.environ.get("POSTGRES_PORT", "5432"))
@@ -58,7 +133,9 @@ def get_db_connection():
     user = os.environ.get("POSTGRES_USER", "ediscovery")
     password = os.environ.get("POSTGRES_PASSWORD", "BfXUdqKbo7pTAuks")
     
-    return psycopg2.connect(
+    return psycopg2.pool.ThreadedConnectionPool(
+        1,
+        8,
         host=host,
         port=port,
         database=database,
@@ -67,26 +144,35 @@ def get_db_connection():
     )
 
 
-def search_documents(
+def build_search_query(
     query: Optional[str] = None,
     custodian: Optional[str] = None,
     source: Optional[str] = None,
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
-    limit: int = 100
-) -> List[Dict]:
-    """Search documents with various filters."""
-    
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+    limit: int = 100,
+    body_chars: Optional[int] = None
+) -> Tuple[str, List, str]:
+    """
+    Build the document search SELECT; returns (sql, params, order_by).
+    
+    body_chars limits body_text to its first body_chars characters, cut on
+    the server; 0 leaves it NULL and None returns it whole.
+    """
+    if body_chars is None:
+        body_text = "d.body_text"
+    elif body_chars:
+        body_text = f"LEFT(d.body_text, {int(body_chars)}) as body_text"
+    else:
+        body_text = "NULL::text as body_text"
     
     # Build query dynamically
-    sql_parts = ["""
+    sql_parts = [f"""
         SELECT 
             d.document_id,
             d.source,
             d.subject,
-            d.body_text,
+            {body_text},
             d.collected_at,
             d.indexed_at,
             c.identifier as custodian_id,
@@ -94,27 +180,32 @@ def search_documents(
             c.display_name as custodian_name
     """]
     
-    # Add relevance score if doing text search
+    # Text searches carry the vector and query out to be ranked (see below)
     if query:
         sql_parts[0] += """,
-            ts_rank(d.search_vector, plainto_tsquery('english', %s)) as relevance
+            d.search_vector,
+            q.tsq
         """
     
     sql_parts.append("""
         FROM documents d
         LEFT JOIN custodians c ON d.custodian_id = c.id
-        WHERE 1=1
     """)
     
     params = []
     
-    # Add text search filter
+    # The tsquery is built once, in FROM, and shared by the filter and the rank
     if query:
-        sql_parts.append("AND d.search_vector @@ plainto_tsquery('english', %s)")
+        sql_parts.append("CROSS JOIN plainto_tsquery('english', %s) AS q(tsq)")
         params.append(query)
-        params.append(query)  # Used twice (once for rank, once for filter)
     
-    # Add custodian filter
+    sql_parts.append("WHERE 1=1")
+    
+    # Add text search filter (matched by the GIN index on search_vector, see init_db.sql)
+    if query:
+        sql_parts.append("AND d.search_vector @@ q.tsq")
+    
+    # Add custodian filter (substring match, served by the trigram index from add_custodian_email_trgm.sql)
     if custodian:
         sql_parts.append("AND c.email ILIKE %s")
         params.append(f"%{custodian}%")
@@ -134,76 +225,97 @@ def search_documents(
         params.append(date_to)
     
     # Add ordering and limit
-    if query:
-        sql_parts.append("ORDER BY relevance DESC, d.collected_at DESC")
-    else:
-        sql_parts.append("ORDER BY d.collected_at DESC")
+    if not query:
+        order_by = "collected_at DESC"
+        sql_parts.append(f"ORDER BY {order_by}")
+        sql_parts.append("LIMIT %s")
+        params.append(int(limit))
+        return " ".join(sql_parts), params, order_by
+    
+    # ts_rank isn't indexable, so ranking every match before the LIMIT costs a
+    # rank per matching row. Instead take the newest matches off the indexes
+    # (GIN filter, collected_at order) and rank only those candidates
+    sql_parts.append("ORDER BY d.collected_at DESC")
+    sql_parts.append("LIMIT %s")
+    params.append(max(int(limit), RANK_CANDIDATES))
+    
+    order_by = "relevance DESC, collected_at DESC"
+    sql = f"""
+        SELECT 
+            m.document_id,
+            m.source,
+            m.subject,
+            m.body_text,
+            m.collected_at,
+            m.indexed_at,
+            m.custodian_id,
+            m.custodian_email,
+            m.custodian_name,
+            ts_rank(m.search_vector, m.tsq) as relevance
+        FROM ({" ".join(sql_parts)}) m
+        ORDER BY {order_by}
+        LIMIT %s
+    """
+    params.append(int(limit))
+    return sql, params, order_by
+
+
+def search_documents(
+    query: Optional[str] = None,
+    custodian: Optional[str] = None,
+    source: Optional[str] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    limit: int = 100,
+    body_chars: Optional[int] = None
+) -> List[Dict]:
+    """Search documents with various filters (see build_search_query for body_chars)."""
+    search_sql, params, order_by = build_search_query(query, custodian, source, date_from, date_to, limit, body_chars)
     
-    sql_parts.append(f"LIMIT {limit}")
+    # The server turns the rows into one JSON array (kept in the same order),
+    # so the client parses a single value instead of building a dict per row
+    sql = f"SELECT COALESCE(json_agg(t ORDER BY {order_by}), '[]') FROM ({search_sql}) t"
     
     # Execute query
-    sql = " ".join(sql_parts)
-    cursor.execute(sql, params)
-    results = cursor.fetchall()
-    
-    cursor.close()
-    conn.close()
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(sql, params)
+            # psycopg2 decodes the json column; timestamps arrive as ISO strings
+            return cursor.fetchone()[0]
+    finally:
+        release_db_connection(conn)
+
+
+def iter_search_rows(sql: str, params: List, order_by: str) -> Iterator[Dict]:
+    """
+    Stream the rows of a search query as dicts, without holding them all.
     
-    return [dict(row) for row in results]
+    A named (server-side) cursor fetches SEARCH_ITERSIZE rows per round-trip,
+    so client memory is bounded by that, not by the number of results.
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor(name="search_export") as cursor:
+            cursor.itersize = SEARCH_ITERSIZE
+            # row_to_json keeps the dict keys and ISO timestamps of search_documents()
+            cursor.execute(f"SELECT row_to_json(t) FROM ({sql}) t ORDER BY {order_by}", params)
+            for (row,) in cursor:
+                yield row
+    finally:
+        release_db_connection(conn)
 
 
 def get_statistics() -> Dict:
     """Get database statistics."""
     conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-    
-    stats = {}
-    
-    # Total documents
-    cursor.execute("SELECT COUNT(*) as count FROM documents")
-    stats["total_documents"] = cursor.fetchone()["count"]
-    
-    # Total custodians
-    cursor.execute("SELECT COUNT(DISTINCT custodian_id) as count FROM documents")
-    stats["total_custodians"] = cursor.fetchone()["count"]
-    
-    # Documents by source
-    cursor.execute("""
-        SELECT source, COUNT(*) as count 
-        FROM documents 
-        GROUP BY source 
-        ORDER BY count DESC
-    """)
-    stats["by_source"] = [dict(row) for row in cursor.fetchall()]
-    
-    # Date range
-    cursor.execute("""
-        SELECT 
-            MIN(collected_at) as earliest,
-            MAX(collected_at) as latest
-        FROM documents
-    """)
-    dates = cursor.fetchone()
-    stats["date_range"] = {
-        "earliest": dates["earliest"].isoformat() if dates["earliest"] else None,
-        "latest": dates["latest"].isoformat() if dates["latest"] else None
-    }
-    
-    # Top custodians
-    cursor.execute("""
-        SELECT c.email, c.display_name, COUNT(*) as doc_count
-        FROM documents d
-        JOIN custodians c ON d.custodian_id = c.id
-        GROUP BY c.email, c.display_name
-        ORDER BY doc_count DESC
-        LIMIT 10
-    """)
-    stats["top_custodians"] = [dict(row) for row in cursor.fetchall()]
-    
-    cursor.close()
-    conn.close()
-    
-    return stats
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(STATISTICS_SQL)
+            # psycopg2 decodes json columns; timestamps arrive as ISO strings
+            return cursor.fetchone()[0]
+    finally:
+        release_db_connection(conn)
 
 
 def print_results(results: List[Dict], show_body: bool = False):
@@ -226,8 +338,8 @@ def print_results(results: List[Dict], show_body: bool = False):
             print(f"Relevance:  {doc['relevance']:.4f}")
         
         if show_body and doc.get('body_text'):
-            body_preview = doc['body_text'][:200]
-            if len(doc['body_text']) > 200:
+            body_preview = doc['body_text'][:BODY_PREVIEW_CHARS]
+            if len(doc['body_text']) > BODY_PREVIEW_CHARS:
                 body_preview += "..."
             print(f"Body:       {body_preview}")
         
@@ -236,30 +348,47 @@ def print_results(results: List[Dict], show_body: bool = False):
     print()
 
 
-def export_results(results: List[Dict], format: str, output: str):
-    """Export results to file."""
-    if format == "csv":
-        with open(output, 'w', newline='') as f:
-            if not results:
-                return
-            
-            writer = csv.DictWriter(f, fieldnames=results[0].keys())
-            writer.writeheader()
-            writer.writerows(results)
-        
-        print(f"✅ Exported {len(results)} results to {output}")
-    
-    elif format == "json":
-        # Convert datetime objects to strings
-        for doc in results:
-            for key, value in doc.items():
-                if isinstance(value, datetime):
-                    doc[key] = value.isoformat()
-        
+def export_results(results: Iterable[Dict], format: str, output: str):
+    """
+    Export results to file (CSV is streamed by export_csv_via_copy instead).
+    
+    results may be a generator (see iter_search_rows); rows are written as
+    they arrive, laid out as json.dump(results, f, indent=2) would.
+    """
+    if format == "json":
+        count = 0
+        # Rows are already JSON values (timestamps as ISO strings)
         with open(output, 'w') as f:
-            json.dump(results, f, indent=2, default=str)
+            f.write("[")
+            for row in results:
+                if count:
+                    f.write(",")
+                f.write("\n  " + json.dumps(row, indent=2, default=str).replace("\n", "\n  "))
+                count += 1
+            f.write("\n]" if count else "]")
         
-        print(f"✅ Exported {len(results)} results to {output}")
+        print(f"✅ Exported {count} results to {output}")
+
+
+def export_csv_via_copy(sql: str, params: List, output: str):
+    """
+    Export a query's rows to CSV with COPY ... TO STDOUT.
+    
+    PostgreSQL writes the CSV (header included) and it is streamed straight
+    into the file, so no rows are built in Python and memory stays flat
+    however many rows are exported.
+    """
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cursor, open(output, 'wb') as f:
+            # COPY takes no bind parameters, so they are inlined (safely quoted) first
+            query = cursor.mogrify(sql, params).decode()
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH CSV HEADER", f)
+            count = cursor.rowcount
+    finally:
+        release_db_connection(conn)
+    
+    print(f"✅ Exported {count} results to {output}")
 
 
 def print_statistics(stats: Dict):
@@ -319,6 +448,8 @@ Examples:
     # Export options
     parser.add_argument("--export", "-e", choices=["csv", "json"], help="Export format")
     parser.add_argument("--output", "-o", help="Export output file")
+    parser.add_argument("--full-body", action="store_true",
+                        help="Include the full body text in exports (omitted by default)")
     
     args = parser.parse_args()
     
@@ -332,6 +463,24 @@ Examples:
             print_statistics(stats)
             return
         
+        # Exports stream rows to the file instead of fetching them all first
+        if args.export and args.output:
+            sql, params, order_by = build_search_query(
+                query=args.query,
+                custodian=args.custodian,
+                source=args.source,
+                date_from=args.date_from,
+                date_to=args.date_to,
+                limit=args.limit,
+                body_chars=None if args.full_body else 0
+            )
+            if args.export == "csv":
+                # CSV is written by the server
+                export_csv_via_copy(sql, params, args.output)
+            else:
+                export_results(iter_search_rows(sql, params, order_by), args.export, args.output)
+            return
+        
         # Search documents
         results = search_documents(
             query=args.query,
@@ -339,15 +488,13 @@ Examples:
             source=args.source,
             date_from=args.date_from,
             date_to=args.date_to,
-            limit=args.limit
+            limit=args.limit,
+            # One character past the preview is enough to know whether to add "..."
+            body_chars=BODY_PREVIEW_CHARS + 1 if args.body else 0
         )
         
-        # Export if requested
-        if args.export and args.output:
-            export_results(results, args.export, args.output)
-        else:
-            # Print results
-            print_results(results, show_body=args.body)
+        # Print results
+        print_results(results, show_body=args.body)
     
     except psycopg2.Error as e:
         print(f"\n❌ Database error: {e}\n")
@@ -355,6 +502,8 @@ Examples:
     except Exception as e:
         print(f"\n❌ Error: {e}\n")
         sys.exit(1)
+    finally:
+        close_db_pool()
 
 
 if __name__ == "__main__":
@@ -13,17 +13,21 @@ Run this before attempting full ingestion to catch configuration issues early.
 """
 
 import argparse
+import functools
 import json
 import logging
 import os
 import sys
 from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from urllib.parse import quote, urlencode
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from ingestion.config import ConnectorConfig
 from ingestion.connectors.microsoft_graph import MicrosoftGraphConnector
+from scripts.env_file import read_env_file
 
 # Configure logging
 logging.basicConfig(
@@ -33,21 +37,30 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Inbox message listings used by the retrieval, attachment and conversion tests.
+# They are fetched together in one $batch request (Graph allows up to 20 per batch).
+INBOX_LISTINGS = {
+    "sample": {"$top": 3, "$select": "subject,from,receivedDateTime,hasAttachments"},
+    "attachments": {
+        "$top": 10,
+        "$filter": "hasAttachments eq true",
+        "$select": "id,subject,hasAttachments",
+    },
+    "conversion": {"$top": 1},
+}
+# (mailbox, folder_id) -> batch sub-responses keyed by listing name
+_inbox_listings: Dict[Tuple[str, str], Dict[str, Dict[str, Any]]] = {}
+
 
 def load_env_file(env_path: str = ".env") -> None:
     """Load environment variables from .env file."""
-    env_file = Path(env_path)
-    if not env_file.exists():
+    env = read_env_file(Path(env_path))
+    if env is None:
         logger.warning(f"Environment file not found: {env_path}")
         return
 
     logger.info(f"Loading environment from: {env_path}")
-    with open(env_file) as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith("#") and "=" in line:
-                key, value = line.split("=", 1)
-                os.environ[key.strip()] = value.strip()
+    os.environ.update(env)
 
 
 def expand_env_vars(params: dict) -> dict:
@@ -84,6 +97,38 @@ def print_info(message: str) -> None:
     print(f"ℹ {message}")
 
 
+def graph_batch(connector: MicrosoftGraphConnector, urls: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+    """GET several Graph URLs in one $batch round-trip, returning sub-responses by id."""
+    payload = {
+        "requests": [
+            {"id": request_id, "method": "GET", "url": url}
+            for request_id, url in urls.items()
+        ]
+    }
+    response = connector._make_graph_request("/$batch", method="POST", json=payload)
+    return {item["id"]: item for item in response.get("responses", [])}
+
+
+def get_inbox_messages(
+    connector: MicrosoftGraphConnector, folder_id: str, listing: str
+) -> List[Dict[str, Any]]:
+    """Return one of INBOX_LISTINGS for a folder, fetching all of them in one batch per folder."""
+    key = (connector._mailbox, folder_id)
+    if key not in _inbox_listings:
+        base = f"/users/{connector._mailbox}/mailFolders/{folder_id}/messages"
+        _inbox_listings[key] = graph_batch(connector, {
+            name: f"{base}?{urlencode(params, quote_via=quote, safe='$,')}"
+            for name, params in INBOX_LISTINGS.items()
+        })
+
+    response = _inbox_listings[key].get(listing, {})
+    status = response.get("status", 500)
+    if status >= 400:
+        error = response.get("body", {}).get("error", {})
+        raise RuntimeError(f"{status} {error.get('message', 'no response in batch')}")
+    return response.get("body", {}).get("value", [])
+
+
 def test_authentication(connector: MicrosoftGraphConnector) -> bool:
     """Test Azure AD authentication."""
     print_section("Test 1: Azure AD Authentication")
@@ -149,11 +194,7 @@ def test_message_fetch(connector: MicrosoftGraphConnector) -> bool:
         print_success(f"Found Inbox folder: {folder_id}")
 
         # Fetch a few messages
-        url = f"/users/{connector._mailbox}/mailFolders/{folder_id}/messages"
-        params = {"$top": 3, "$select": "subject,from,receivedDateTime,hasAttachments"}
-
-        response = connector._make_graph_request(url, params=params)
-        messages = response.get("value", [])
+        messages = get_inbox_messages(connector, folder_id, "sample")
 
         if messages:
             print_success(f"Retrieved {len(messages)} sample messages")
@@ -189,15 +230,7 @@ def test_attachment_handling(connector: MicrosoftGraphConnector) -> bool:
             return False
 
         # Find a message with attachments
-        url = f"/users/{connector._mailbox}/mailFolders/{folder_id}/messages"
-        params = {
-            "$top": 10,
-            "$filter": "hasAttachments eq true",
-            "$select": "id,subject,hasAttachments",
-        }
-
-        response = connector._make_graph_request(url, params=params)
-        messages = response.get("value", [])
+        messages = get_inbox_messages(connector, folder_id, "attachments")
 
         if not messages:
             print_info("No messages with attachments found (skipping test)")
@@ -238,11 +271,7 @@ def test_document_conversion(connector: MicrosoftGraphConnector) -> bool:
             print_error("Could not find Inbox folder")
             return False
 
-        url = f"/users/{connector._mailbox}/mailFolders/{folder_id}/messages"
-        params = {"$top": 1}
-
-        response = connector._make_graph_request(url, params=params)
-        messages = response.get("value", [])
+        messages = get_inbox_messages(connector, folder_id, "conversion")
 
         if not messages:
             print_info("No messages found for conversion test (skipping)")
@@ -307,6 +336,9 @@ def run_comprehensive_test(
         print_error(f"Failed to initialize connector: {e}")
         return False
 
+    # Several tests look up the Inbox; resolve each folder name once per run
+    connector._get_folder_id = functools.lru_cache(maxsize=32)(connector._get_folder_id)
+
     # Run tests
     tests = [
         ("Authentication", lambda: test_authentication(connector)),
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""Tests for the bulk database loads: binary embedding COPY and batched bulk_index."""
+
+import struct
+import sys
+from datetime import datetime
+
+import psycopg2.extras
+
+from ingestion.models import Attachment, ChainOfCustodyEvent, Custodian, EvidenceDocument
+from ingestion.storage import PostgresMetadataStore
+from scripts.generate_embeddings import build_embedding_copy
+
+
+def read_binary_copy(data):
+    """Decode a PostgreSQL binary COPY stream into a list of tuples of raw field bytes."""
+    assert data[:11] == b"PGCOPY\n\xff\r\n\x00"
+    flags, extension = struct.unpack_from("!ii", data, 11)
+    assert (flags, extension) == (0, 0)
+
+    pos = 19
+    rows = []
+    while True:
+        (count,) = struct.unpack_from("!h", data, pos)
+        pos += 2
+        if count == -1:
+            break
+        fields = []
+        for _ in range(count):
+            (length,) = struct.unpack_from("!i", data, pos)
+            pos += 4
+            fields.append(data[pos:pos + length])
+            pos += length
+        rows.append(tuple(fields))
+
+    assert pos == len(data), "bytes after the COPY trailer"
+    return rows
+
+
+def decode_vector(field):
+    """pgvector's binary form: int16 dimensions, int16 unused, then float4s."""
+    dims, unused = struct.unpack_from("!hh", field)
+    assert unused == 0
+    assert len(field) == 4 + 4 * dims
+    return list(struct.unpack_from(f"!{dims}f", field, 4))
+
+
+class FakeConnection:
+    def __init__(self):
+        self.statements = []
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=None):
+        self.statements.append((sql, params))
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def getconn(self):
+        return self.conn
+
+    def putconn(self, conn):
+        pass
+
+
+def test_embedding_copy_round_trip():
+    """Every row decodes back to its document ID, embedding (as float4) and model."""
+    rows = [
+        ("ENRON_000001", [0.5, -1.25, 3.0]),
+        ("ENRON_ü_2", [0.1] * 1536),
+    ]
+
+    decoded = read_binary_copy(build_embedding_copy(rows, "text-embedding-3-small").getvalue())
+
+    print(f"✓ Binary COPY: {len(decoded)} rows")
+    assert len(decoded) == len(rows)
+    for (doc_id, embedding), (doc_field, vector_field, model_field) in zip(rows, decoded):
+        assert doc_field.decode() == doc_id
+        assert decode_vector(vector_field) == [struct.unpack("!f", struct.pack("!f", v))[0] for v in embedding]
+        assert model_field == b"text-embedding-3-small"
+
+    assert read_binary_copy(build_embedding_copy([], "m").getvalue()) == []
+
+
+def test_bulk_index_dedupes_batch():
+    """Repeated custodians and documents are sent once each, the last occurrence winning."""
+    collected = datetime(2001, 10, 16)
+
+    def document(doc_id, custodian_name, subject, attachments=(), events=()):
+        return EvidenceDocument(
+            document_id=doc_id,
+            source="enron-emails",
+            collected_at=collected,
+            custodian=Custodian("ken.lay", display_name=custodian_name, email="ken.lay@enron.com"),
+            subject=subject,
+            body_text="body",
+            raw_path=None,
+            attachments=list(attachments),
+            chain_of_custody=list(events),
+        )
+
+    attachment = Attachment("memo.pdf", "application/pdf", 3, b"pdf")
+    event = ChainOfCustodyEvent(collected, "ingest", "collected")
+    documents = [
+        document("doc-1", "Ken", "first", attachments=[attachment]),
+        document("doc-2", "Ken", "other", events=[event]),
+        document("doc-1", "Kenneth Lay", "second", events=[event]),
+    ]
+
+    calls = []
+
+    def execute_values(cursor, sql, rows, page_size=None, fetch=False):
+        calls.append((sql, list(rows)))
+        if "INSERT INTO custodians" in sql:
+            return [(row[0], 10) for row in rows]
+        if "INSERT INTO documents" in sql:
+            return [(row[0], 100 + i) for i, row in enumerate(rows)]
+        return None
+
+    conn = FakeConnection()
+    store = object.__new__(PostgresMetadataStore)
+    store._pool = FakePool(conn)
+
+    original = psycopg2.extras.execute_values
+    psycopg2.extras.execute_values = execute_values
+    try:
+        store.bulk_index(documents)
+    finally:
+        psycopg2.extras.execute_values = original
+
+    custodian_rows, document_rows, attachment_rows, event_rows = (rows for _, rows in calls)
+
+    print(f"✓ bulk_index: {len(custodian_rows)} custodian, {len(document_rows)} document rows")
+    assert custodian_rows == [("ken.lay", "Kenneth Lay", "ken.lay@enron.com")]
+    assert [(row[0], row[3]) for row in document_rows] == [("doc-1", "second"), ("doc-2", "other")]
+    assert all(row[2] == 10 for row in document_rows)
+    # doc-1's attachments come from the earlier occurrence, the only one that has any
+    assert conn.statements == [("DELETE FROM attachments WHERE document_id = ANY(%s)", ([100],))]
+    assert [row[:2] for row in attachment_rows] == [(100, "memo.pdf")]
+    assert sorted(row[0] for row in event_rows) == [100, 101]
+
+
+def main():
+    """Run all tests."""
+    print("=" * 60)
+    print("Bulk Load Test Suite")
+    print("=" * 60)
+    print()
+
+    tests = [
+        ("Embedding Binary COPY", test_embedding_copy_round_trip),
+        ("bulk_index Dedupe", test_bulk_index_dedupes_batch),
+    ]
+
+    failed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+        except Exception as e:
+            print(f"✗ {test_name} FAILED: {e!r}")
+            failed += 1
+
+    print("=" * 60)
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
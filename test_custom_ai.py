@@ -8,12 +8,15 @@ import time
 
 BASE_URL = "http://localhost:8080"
 
+# One keep-alive connection for every call, including the progress polls
+SESSION = requests.Session()
+
 def test_custom_ai_flow():
     print("🧪 Testing Custom AI Analysis Feature\n")
     
     # Step 1: Get some documents
     print("1️⃣ Getting documents...")
-    response = requests.post(
+    response = SESSION.post(
         f"{BASE_URL}/api/search",
         json={"query": "", "limit": 5}
     )
@@ -31,7 +34,7 @@ def test_custom_ai_flow():
     print("2️⃣ Starting custom AI analysis...")
     custom_prompt = "Analyze this document for key topics and themes. Provide a brief 1-sentence summary."
     
-    response = requests.post(
+    response = SESSION.post(
         f"{BASE_URL}/api/custom-ai-analysis",
         json={
             "document_ids": doc_ids[:3],  # Just test with 3 docs
@@ -55,7 +58,7 @@ def test_custom_ai_flow():
     polls = 0
     
     while polls < max_polls:
-        response = requests.get(f"{BASE_URL}/api/custom-ai-progress/{job_id}")
+        response = SESSION.get(f"{BASE_URL}/api/custom-ai-progress/{job_id}")
         progress = response.json()
         
         if not progress['success']:
@@ -83,7 +86,7 @@ def test_custom_ai_flow():
     # Step 4: Verify results were saved
     print("4️⃣ Verifying results...")
     test_doc_id = doc_ids[0]
-    response = requests.get(f"{BASE_URL}/api/document/{test_doc_id}/review")
+    response = SESSION.get(f"{BASE_URL}/api/document/{test_doc_id}/review")
     review_data = response.json()
     
     if review_data['success'] and review_data['review']:
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Tests for load file export and email parsing: enrichment CSV, email JSON headers, raw Enron messages."""
+
+import csv
+import io
+import json
+import sys
+import tempfile
+from pathlib import Path
+
+from integrations.relativity_loader import RelativityDocument, RelativityEnrichmentExporter
+from scripts.download_enron import parse_eml
+from scripts.export_enron_to_relativity import HEAD_BYTES, load_email_headers
+
+
+def expected_enrichment_csv(documents):
+    """The enrichment CSV as the csv module alone would write it."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow([
+        'DocID', 'AI_Responsive', 'AI_Responsive_Confidence', 'AI_Privileged',
+        'AI_Privilege_Confidence', 'AI_Privilege_Type', 'AI_Classification', 'AI_Topics',
+        'Hot_Score', 'AI_Sentiment', 'AI_Entities', 'Redaction_Suggestions', 'Similar_Document_IDs',
+    ])
+    for doc in documents:
+        writer.writerow([
+            doc.doc_id or '',
+            doc.ai_responsive or '',
+            f"{doc.ai_responsive_confidence:.2f}" if doc.ai_responsive_confidence else '',
+            doc.ai_privileged or '',
+            f"{doc.ai_privilege_confidence:.2f}" if doc.ai_privilege_confidence else '',
+            '',
+            doc.ai_classification or '',
+            ';'.join(doc.ai_topics) if doc.ai_topics else '',
+            str(doc.hot_score) if doc.hot_score else '',
+            '', '', '', '',
+        ])
+    return buf.getvalue().encode('utf-8')
+
+
+def write_email(directory, name, email):
+    """Write an email JSON file the way the Enron export source stores them."""
+    path = Path(directory) / name
+    path.write_text(json.dumps(email, indent=2))
+    return path
+
+
+def read_headers(path):
+    with open(path, 'rb') as ef:
+        return load_email_headers(ef)
+
+
+def test_enrichment_export_matches_csv_module():
+    """The unquoted fast path and the csv fallback together write exactly what csv.writer would."""
+    documents = [
+        RelativityDocument(doc_id='EMAIL001', ai_responsive='Yes', ai_responsive_confidence=0.876,
+                           ai_classification='Hot Document', ai_topics=['Raptor', 'LJM'], hot_score=92),
+        RelativityDocument(doc_id='EMAIL002', ai_classification='Routine, low value'),
+        RelativityDocument(doc_id='EMAIL003', ai_topics=['He said "shred it"']),
+        RelativityDocument(doc_id='EMAIL004', ai_classification='multi\nline'),
+        RelativityDocument(doc_id='EMAIL005', ai_privileged='Oui – privilégié', ai_privilege_confidence=0.5),
+        RelativityDocument(doc_id=''),
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output = Path(tmp) / 'AI_ENRICHMENT.csv'
+        RelativityEnrichmentExporter(output).export(documents)
+        written = output.read_bytes()
+
+    print(f"✓ Enrichment CSV: {len(written)} bytes")
+    assert written == expected_enrichment_csv(documents)
+
+
+def test_email_headers_from_head_only():
+    """A large email's headers are parsed from the head, without the body."""
+    email = {"From": "ken.lay@enron.com", "Date": "Mon, 14 May 2001", "Subject": "Raptor",
+             "To": "jeff.skilling@enron.com", "Cc": "", "body": "x" * (HEAD_BYTES * 4)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        headers = read_headers(write_email(tmp, 'large.json', email))
+
+    print(f"✓ Head-only parse: {sorted(headers)}")
+    assert 'body' not in headers
+    assert headers == {key: value for key, value in email.items() if key != 'body'}
+
+
+def test_email_headers_fall_back_to_full_parse():
+    """Small files, bodies that aren't last and missing headers all get a full parse."""
+    big_body = "y" * (HEAD_BYTES * 2)
+    cases = {
+        'small.json': {"From": "a@enron.com", "Date": "", "Subject": "s", "To": "", "Cc": "", "body": "short"},
+        'body_first.json': {"body": big_body, "From": "a@enron.com", "Date": "", "Subject": "s", "To": "", "Cc": ""},
+        'no_cc.json': {"From": "a@enron.com", "Date": "", "Subject": "s", "To": "", "body": big_body},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, email in cases.items():
+            assert read_headers(write_email(tmp, name, email)) == email, name
+
+    print(f"✓ Full-parse fallbacks: {len(cases)} cases")
+
+
+def test_email_headers_ignore_body_key_inside_values():
+    """A header value that spells out a body member doesn't cut the head short."""
+    email = {"From": "a@enron.com", "Date": "", "Subject": 'fwd: , "body": "gotcha"', "To": "", "Cc": "",
+             "body": "z" * (HEAD_BYTES * 2)}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        headers = read_headers(write_email(tmp, 'tricky.json', email))
+
+    print(f"✓ Quoted body key: {headers['Subject']!r}")
+    assert headers['Subject'] == email['Subject']
+    assert headers.get('body', email['body']) == email['body']
+
+
+def test_parse_eml():
+    """The four headers are read (folded lines included) and the rest is the body."""
+    message = (
+        "Message-ID: <1.JavaMail.evans@thyme>\n"
+        "Date: Mon, 14 May 2001 16:39:00 -0700 (PDT)\n"
+        "From: phillip.allen@enron.com\n"
+        "To: tim.belden@enron.com,\n"
+        "\tjohn.arnold@enron.com\n"
+        "Subject: Forecast\n"
+        "X-From: Phillip K Allen\n"
+        "\n"
+        "Here is our forecast\n"
+        "\n"
+        "Subject: not a header\n"
+    )
+
+    email = parse_eml(message)
+
+    print(f"✓ parse_eml: {email['subject']!r} to {email['to']!r}")
+    assert email['from'] == 'phillip.allen@enron.com'
+    assert email['to'] == 'tim.belden@enron.com,\n\tjohn.arnold@enron.com'
+    assert email['subject'] == 'Forecast'
+    assert email['date'] == 'Mon, 14 May 2001 16:39:00 -0700 (PDT)'
+    assert email['body'] == "Here is our forecast\n\nSubject: not a header\n"
+
+    missing = parse_eml("X-Folder: inbox\n\nbody only")
+    assert (missing['from'], missing['to'], missing['subject'], missing['date']) == \
+        ('unknown', 'unknown', 'No Subject', '')
+    assert missing['body'] == 'body only'
+
+
+def main():
+    """Run all tests."""
+    print("=" * 60)
+    print("Load File Export Test Suite")
+    print("=" * 60)
+    print()
+
+    tests = [
+        ("Enrichment CSV", test_enrichment_export_matches_csv_module),
+        ("Email Headers (head)", test_email_headers_from_head_only),
+        ("Email Headers (fallback)", test_email_headers_fall_back_to_full_parse),
+        ("Email Headers (quoted key)", test_email_headers_ignore_body_key_inside_values),
+        ("Raw Message Parsing", test_parse_eml),
+    ]
+
+    failed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+        except Exception as e:
+            print(f"✗ {test_name} FAILED: {e!r}")
+            failed += 1
+
+    print("=" * 60)
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Tests for the search SQL built by scripts/search.py."""
+
+import re
+import sys
+
+from scripts.search import RANK_CANDIDATES, build_search_query
+
+
+def placeholders(sql):
+    return len(re.findall(r"%s", sql))
+
+
+def test_filters_bind_every_value():
+    """Every filter value and limit is a bound parameter, in placeholder order."""
+    sql, params, order_by = build_search_query(
+        custodian="kenneth", source="enron-emails", date_from="2001-01-01", date_to="2001-12-31", limit=25
+    )
+
+    print(f"✓ Filter params: {params}")
+    assert placeholders(sql) == len(params)
+    assert params == ["%kenneth%", "enron-emails", "2001-01-01", "2001-12-31", 25]
+    assert order_by == "collected_at DESC"
+    assert "ts_rank" not in sql
+    # Nothing user-supplied is spliced into the SQL text
+    assert "kenneth" not in sql and "enron-emails" not in sql
+
+
+def test_text_search_ranks_newest_candidates():
+    """A text search ranks at most RANK_CANDIDATES newest matches, then applies the limit."""
+    sql, params, order_by = build_search_query(query="raptor ljm", limit=10)
+
+    print(f"✓ Text search params: {params}")
+    assert placeholders(sql) == len(params)
+    assert params == ["raptor ljm", RANK_CANDIDATES, 10]
+    assert order_by == "relevance DESC, collected_at DESC"
+    assert sql.count("plainto_tsquery") == 1
+    assert "ts_rank(m.search_vector, m.tsq)" in sql
+
+    # A limit above the candidate pool widens the pool instead of being cut by it
+    assert build_search_query(query="raptor", limit=5000)[1] == ["raptor", 5000, 5000]
+
+
+def test_body_projection():
+    """body_chars: None selects the whole body, n the first n characters, 0 none of it."""
+    full = build_search_query(body_chars=None)[0]
+    preview = build_search_query(body_chars=201)[0]
+    none = build_search_query(body_chars=0)[0]
+
+    print("✓ Body projections")
+    assert "d.body_text," in full and "LEFT(" not in full
+    assert "LEFT(d.body_text, 201) as body_text" in preview
+    assert "NULL::text as body_text" in none and "d.body_text" not in none
+
+
+def main():
+    """Run all tests."""
+    print("=" * 60)
+    print("Search Query Test Suite")
+    print("=" * 60)
+    print()
+
+    tests = [
+        ("Bound Filters", test_filters_bind_every_value),
+        ("Ranked Text Search", test_text_search_ranks_newest_candidates),
+        ("Body Projection", test_body_projection),
+    ]
+
+    failed = 0
+    for test_name, test_func in tests:
+        try:
+            test_func()
+        except Exception as e:
+            print(f"✗ {test_name} FAILED: {e!r}")
+            failed += 1
+
+    print("=" * 60)
+    print(f"Results: {len(tests) - failed}/{len(tests)} tests passed")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,6 +10,8 @@ Run with:
 Then open: http://localhost:5000
 """
 
+import csv
+import io
 import os
 import sys
 import json
@@ -1218,6 +1220,27 @@ REDACTED_BODY: [full body text with redactions applied]"""
         custom_ai_progress[job_id]['completed'] = True
 
 
+# Shared by the bulk and per-document paths of /api/relativity/upload
+RELATIVITY_UPSERT_CONFLICT = """
+    ON CONFLICT (document_id) DO UPDATE SET
+        subject = EXCLUDED.subject,
+        body_text = EXCLUDED.body_text,
+        metadata_json = EXCLUDED.metadata_json,
+        indexed_at = EXCLUDED.indexed_at
+"""
+
+
+def strip_nul(value):
+    """Remove NUL characters from a string, or from every string in a dict/list."""
+    if isinstance(value, str):
+        return value.replace('\x00', '')
+    if isinstance(value, dict):
+        return {strip_nul(k): strip_nul(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [strip_nul(v) for v in value]
+    return value
+
+
 @app.route('/relativity')
 def relativity_integration():
     """Relativity integration page."""
@@ -1275,7 +1298,19 @@ def api_relativity_upload():
         print(f"Looking for TEXT directory at: {text_dir}")
         print(f"TEXT directory exists: {text_dir.exists()}")
         
+        # Stage every document as CSV and load it with a single COPY.
+        # Keyed by DOCID so a repeated ID keeps its last row, as the old per-row upsert did.
+        staged = {}
+        failed = []
+        now = datetime.now()
+        
         for doc in documents:
+            doc_id = strip_nul(doc.doc_id or '').strip()
+            if not doc_id or len(doc_id) > 255:
+                print(f"❌ Skipping document with invalid DOCID: {doc.doc_id!r}")
+                failed.append(doc.doc_id)
+                continue
+            
             # Read text content if available
             text_content = ""
             if text_dir.exists():
@@ -1289,49 +1324,99 @@ def api_relativity_upload():
                             text_content = f.read()
                         print(f"Read text file: {text_file} ({len(text_content)} chars)")
             
-            # Ingest into database
-            try:
-                cursor.execute("""
-                    INSERT INTO documents (
-                        document_id, source, subject, body_text,
-                        collected_at, indexed_at, metadata_json
-                    ) VALUES (
-                        %s, %s, %s, %s,
-                        %s, %s, %s
-                    ) ON CONFLICT (document_id) DO UPDATE SET
-                        subject = EXCLUDED.subject,
-                        body_text = EXCLUDED.body_text,
-                        metadata_json = EXCLUDED.metadata_json,
-                        indexed_at = EXCLUDED.indexed_at
-                """, (
-                    doc.doc_id,
-                    'relativity_import',
-                    doc.subject or '',
-                    text_content,
-                    datetime.now(),
-                    datetime.now(),
-                    json.dumps(doc.metadata)
-                ))
-                
-                # Commit each document immediately
-                conn.commit()
-                ingested_count += 1
-                
-            except Exception as e:
-                import traceback
-                print(f"❌ Error ingesting document {doc.doc_id}: {e}")
-                print(traceback.format_exc())
-                import sys
-                sys.stdout.flush()
-                # Rollback this failed transaction
-                conn.rollback()
-                continue
+            # NUL can't be stored in a text column or a JSONB string
+            staged[doc_id] = (
+                doc_id,
+                'relativity_import',
+                strip_nul(doc.subject or ''),
+                strip_nul(text_content),
+                now,
+                now,
+                json.dumps(strip_nul(doc.metadata))
+            )
+        
+        buf = io.StringIO()
+        csv.writer(buf).writerows(staged.values())
+        buf.seek(0)
+        
+        # Ingest into database
+        try:
+            cursor.execute("""
+                CREATE TEMP TABLE _relativity_stage (
+                    document_id VARCHAR(255),
+                    source VARCHAR(100),
+                    subject TEXT,
+                    body_text TEXT,
+                    collected_at TIMESTAMP,
+                    indexed_at TIMESTAMP,
+                    metadata_json JSONB
+                ) ON COMMIT DROP
+            """)
+            # FORCE_NOT_NULL keeps empty subjects/bodies as '' rather than NULL
+            cursor.copy_expert(
+                "COPY _relativity_stage FROM STDIN "
+                "WITH (FORMAT csv, FORCE_NOT_NULL (subject, body_text))",
+                buf
+            )
+            
+            cursor.execute(f"""
+                INSERT INTO documents (
+                    document_id, source, subject, body_text,
+                    collected_at, indexed_at, metadata_json
+                )
+                SELECT
+                    document_id, source, subject, body_text,
+                    collected_at, indexed_at, metadata_json
+                FROM _relativity_stage
+                {RELATIVITY_UPSERT_CONFLICT}
+            """)
+            ingested_count = cursor.rowcount
+            
+            conn.commit()
+            
+        except Exception as e:
+            import traceback
+            print(f"❌ Bulk load failed, retrying documents one at a time: {e}")
+            print(traceback.format_exc())
+            sys.stdout.flush()
+            conn.rollback()
+            
+            # Isolate the bad rows: each document gets its own transaction, as before the COPY
+            for row in staged.values():
+                try:
+                    cursor.execute(f"""
+                        INSERT INTO documents (
+                            document_id, source, subject, body_text,
+                            collected_at, indexed_at, metadata_json
+                        ) VALUES (
+                            %s, %s, %s, %s,
+                            %s, %s, %s
+                        ) {RELATIVITY_UPSERT_CONFLICT}
+                    """, row)
+                    conn.commit()
+                    ingested_count += 1
+                except Exception as e:
+                    print(f"❌ Error ingesting document {row[0]}: {e}")
+                    sys.stdout.flush()
+                    conn.rollback()
+                    failed.append(row[0])
         
         cursor.close()
         conn.close()
         
         print(f"✅ Ingested {ingested_count} documents into database")
         
+        if failed:
+            return jsonify({
+                'success': False,
+                'filename': file.filename,
+                'total_documents': len(documents),
+                'ingested_count': ingested_count,
+                'failed_documents': failed,
+                'error': f'{len(failed)} of {len(documents)} documents could not be ingested '
+                         f'({ingested_count} were); see the server log for details'
+            })
+        
         return jsonify({
             'success': True,
             'filename': file.filename,